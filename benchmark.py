@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the homepage generator
+Generates synthetic content trees of any size and measures end-to-end and
+per-phase build performance (pages/s, MB/s, peak memory), storing results so
+runs can be compared over time
+"""
+
+import io
+import os
+import json
+import time
+import random
+import shutil
+import struct
+import zlib
+import argparse
+import platform
+import resource
+import subprocess
+import multiprocessing
+import tempfile
+import traceback
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+WORDS = ("system model memory latency serving cluster scheduler inference kernel "
+         "graph token cache throughput sparse expert accelerator compiler runtime "
+         "benchmark dataset training pipeline storage network checkpoint gradient").split()
+TAGS = ["Deep Learning", "Systems", "LLM", "Serving", "Compilers", "HPC", "Physics",
+        "Hackathon", "Tools", "Visualization", "Databases", "Security"]
+CODE_SAMPLE = '''```python
+def schedule(requests, workers):
+    """Assign requests to the least loaded worker"""
+    load = {w: 0 for w in workers}
+    for req in sorted(requests, key=lambda r: r.cost, reverse=True):
+        target = min(load, key=load.get)
+        load[target] += req.cost
+        yield req, target
+```'''
+
+
+def tiny_png(width: int, height: int, color: tuple) -> bytes:
+    """Encode a solid-color RGB PNG without Pillow"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    raw = b''.join(b'\x00' + bytes(color) * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def markdown_body(rng: random.Random, size_kb: int, code_blocks: int) -> str:
+    """Markdown body of roughly size_kb KiB with headings, lists and code"""
+    parts = []
+    size = 0
+    section = 0
+    while size < size_kb * 1024:
+        section += 1
+        block = [f"## Section {section}", '', ' '.join(sentence(rng, rng.randint(8, 20)) for _ in range(5)), '',
+                 *[f"- {sentence(rng, 6)}" for _ in range(3)], '']
+        if section <= code_blocks:
+            block += [CODE_SAMPLE, '']
+        text = '\n'.join(block)
+        parts.append(text)
+        size += len(text)
+    return '\n'.join(parts)
+
+
+def random_date(rng: random.Random) -> str:
+    return f"{rng.randint(2015, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z"
+
+
+def write_author(path: Path, name: str, role: str):
+    path.write_text(f'''---
+title: {name}
+name_pronunciation: {name}
+role: {role}
+organizations:
+  - name: Synthetic University
+    url: 'https://example.org'
+social:
+  - icon: envelope
+    icon_pack: fas
+    link: 'mailto:someone@example.org'
+  - icon: github
+    icon_pack: fab
+    link: https://github.com/example
+  - icon: google-scholar
+    icon_pack: ai
+    link: https://scholar.google.com/
+interests:
+  - Machine learning systems
+  - Compilers
+education:
+  courses:
+    - course: PhD in Computer Science
+      institution: Synthetic University
+      year: 2026
+skills:
+  - name: Technical
+    items:
+      - name: Data Science
+        percent: 80
+  - name: Hobbies
+    items:
+      - name: Reading
+        percent: 70
+---
+
+{name} works on large-scale systems for machine learning.
+''', encoding='utf-8')
+
+
+def generate_content(root: Path, publications: int = 500, projects: int = 250, body_kb: int = 4,
+                     code_blocks: int = 2, gallery: int = 2, seed: int = 1):
+    """Write a synthetic content/ tree in the layout generator.py expects"""
+    rng = random.Random(seed)
+    if root.exists():
+        shutil.rmtree(root)
+    author_dir = root / "authors" / "admin"
+    author_dir.mkdir(parents=True)
+
+    (root / "_index.md").write_text('''---
+sections:
+  - block: contact
+    content:
+      email: someone@example.org
+      address:
+        street: 1 Example Road
+        city: Edinburgh
+        country: UK
+---
+''', encoding='utf-8')
+    for section in ["authors", "publication", "project"]:
+        (root / section).mkdir(exist_ok=True)
+        (root / section / "_index.md").write_text(f"---\ntitle: {section}\n---\n", encoding='utf-8')
+        (root / section / "_index.zh.md").write_text(f"---\ntitle: {section} (zh)\n---\n", encoding='utf-8')
+    write_author(author_dir / "_index.md", "Synthetic Author", "PhD Student")
+    write_author(author_dir / "_index.zh.md", "合成作者", "博士生")
+    (author_dir / "avatar.jpg").write_bytes(tiny_png(64, 64, (72, 118, 108)))
+
+    for i in range(publications):
+        item = root / "publication" / f"pub-{i:05d}"
+        item.mkdir()
+        authors = '\n'.join(f"- {rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+                            for _ in range(rng.randint(2, 8)))
+        (item / "index.md").write_text(f'''---
+title: "{sentence(rng, rng.randint(5, 12))[:-1]}"
+authors:
+{authors}
+date: "{random_date(rng)}"
+publication: "Proceedings of the Synthetic Conference"
+publication_short: "SYN {rng.randint(2015, 2026)}"
+publication_status: {rng.choice(['accepted', 'submitted'])}
+url_pdf: "https://example.org/pub-{i}.pdf"
+summary: "{sentence(rng, 30)}"
+---
+
+{markdown_body(rng, body_kb, code_blocks)}
+''', encoding='utf-8')
+        if i % 2 == 0:
+            (item / "featured.png").write_bytes(tiny_png(96, 64, (i % 256, 90, 160)))
+
+    for i in range(projects):
+        item = root / "project" / f"project-{i:05d}"
+        item.mkdir()
+        tags = '\n'.join(f"  - {tag}" for tag in rng.sample(TAGS, rng.randint(1, 3)))
+        (item / "index.md").write_text(f'''---
+title: "Project {i}: {sentence(rng, 3)[:-1]}"
+summary: "{sentence(rng, 20)} See **details** in the [docs](https://example.org)."
+tags:
+{tags}
+date: '{random_date(rng)}'
+---
+
+{markdown_body(rng, body_kb, code_blocks)}
+''', encoding='utf-8')
+        (item / "featured.png").write_bytes(tiny_png(120, 80, (40, i % 256, 120)))
+        for g in range(gallery):
+            (item / f"image-{g}.png").write_bytes(tiny_png(160, 100, (g * 40 % 256, 60, i % 256)))
+
+
+def tree_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def run_scenario(scenario: str, content_dir: str, output_dir: str, cache_dir: str, jobs: int) -> dict:
+    """Build once in this (fresh) process and report timings.
+
+    cold: empty output and cache; warm: full rebuild with a warm cache;
+    noop: incremental build with nothing changed; edit: incremental build
+    after touching one project.
+    """
+    from generator import PersonalHomepageGenerator
+
+    if scenario == 'cold':
+        shutil.rmtree(output_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    elif scenario == 'edit':
+        project = sorted((Path(content_dir) / "project").iterdir())[-1]
+        with open(project / "index.md", 'a', encoding='utf-8') as f:
+            f.write(f"\nEdited at {time.time()}.\n")
+
+    generator = PersonalHomepageGenerator(content_dir, output_dir, cache_dir=cache_dir)
+    generator.profiler.enabled = True
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        generator.generate(force=scenario in ('cold', 'warm'), jobs=jobs, cv=False)
+    wall = time.perf_counter() - start
+
+    events = generator.profiler.events
+    pages = [e for e in events if e['cat'] == 'page']
+    written = sum(e['bytes'] for e in events if e['cat'] == 'phase')
+    phases = {}
+    for event in events:
+        if event['cat'] == 'phase':
+            phases[event['name']] = round(phases.get(event['name'], 0) + event['dur'], 6)
+    return {
+        'wall_s': round(wall, 4),
+        'pages': len(pages),
+        'pages_per_s': round(len(pages) / wall, 1) if wall else None,
+        'mb_written': round(written / 1e6, 3),
+        'mb_per_s': round(written / 1e6 / wall, 2) if wall else None,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'phases_s': phases,
+    }
+
+
+def _scenario_process(results, *args):
+    """Entry point of a scenario's process: send back its result, or the
+    traceback if the build failed"""
+    try:
+        results.put(('ok', run_scenario(*args)))
+    except BaseException:
+        results.put(('error', traceback.format_exc()))
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def load_previous(results_file: Path, params: dict) -> dict | None:
+    """Most recent stored run with the same content parameters"""
+    if not results_file.exists():
+        return None
+    previous = None
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get('params') == params:
+                previous = run
+    return previous
+
+
+def print_results(run: dict, previous: dict | None):
+    print(f"\n{'scenario':<8} {'wall s':>8} {'pages':>7} {'pages/s':>9} {'MB/s':>8} {'peak MB':>8}  vs previous")
+    for scenario, result in run['scenarios'].items():
+        delta = ''
+        if previous and scenario in previous.get('scenarios', {}):
+            before = previous['scenarios'][scenario]['wall_s']
+            if before:
+                delta = f"{(result['wall_s'] - before) / before * 100:+.1f}% ({previous['revision']})"
+        print(f"{scenario:<8} {result['wall_s']:8.3f} {result['pages']:7d} {result['pages_per_s'] or 0:9.1f} "
+              f"{result['mb_per_s'] or 0:8.2f} {result['peak_rss_mb']:8.1f}  {delta}")
+
+    print("\nPhases (s):")
+    names = list(run['scenarios']['cold']['phases_s'])
+    print(f"{'phase':<20}" + ''.join(f"{s:>9}" for s in run['scenarios']))
+    for name in names:
+        print(f"{name:<20}" + ''.join(f"{r['phases_s'].get(name, 0):9.3f}" for r in run['scenarios'].values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the homepage generator on synthetic content")
+    parser.add_argument('--publications', type=int, default=500)
+    parser.add_argument('--projects', type=int, default=250)
+    parser.add_argument('--body-kb', type=int, default=4, help="approximate markdown body size per entry")
+    parser.add_argument('--code-blocks', type=int, default=2, help="highlighted code blocks per entry")
+    parser.add_argument('--gallery', type=int, default=2, help="gallery images per project")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-j', '--jobs', type=int, default=1)
+    parser.add_argument('--workdir', help="keep the synthetic tree and output here (default: temp dir)")
+    parser.add_argument('--results', default='.build-cache/benchmark-results.jsonl',
+                        help="JSON lines file the results are appended to")
+    args = parser.parse_args()
+
+    params = {
+        'publications': args.publications, 'projects': args.projects, 'body_kb': args.body_kb,
+        'code_blocks': args.code_blocks, 'gallery': args.gallery, 'seed': args.seed, 'jobs': args.jobs,
+    }
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='homepage-bench-'))
+    content_dir, output_dir, cache_dir = workdir / "content", workdir / "dist", workdir / "cache"
+
+    print(f"Generating synthetic content in {content_dir}...")
+    generate_content(content_dir, args.publications, args.projects, args.body_kb,
+                     args.code_blocks, args.gallery, args.seed)
+    print(f"  {tree_bytes(content_dir) / 1e6:.1f} MB of content")
+
+    # Each scenario runs in a fresh interpreter so peak memory is per build.
+    # A plain (non-daemonic) process, since builds with --jobs start workers.
+    context = multiprocessing.get_context('spawn')
+    scenarios = {}
+    for scenario in ['cold', 'warm', 'noop', 'edit']:
+        print(f"Running {scenario} build...")
+        results = context.Queue()
+        process = context.Process(target=_scenario_process,
+                                  args=(results, scenario, str(content_dir), str(output_dir),
+                                        str(cache_dir), args.jobs))
+        process.start()
+        status, result = results.get()
+        process.join()
+        if status != 'ok':
+            raise RuntimeError(f"{scenario} build failed:\n{result}")
+        scenarios[scenario] = result
+
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'params': params,
+        'output_mb': round(tree_bytes(output_dir) / 1e6, 2),
+        'scenarios': scenarios,
+    }
+    results_file = Path(args.results)
+    previous = load_previous(results_file, params)
+    print_results(run, previous)
+
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+    print(f"\nResults appended to {results_file}")
+
+    if not args.workdir:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
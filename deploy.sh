@@ -2,10 +2,11 @@
 set -euo pipefail
 
 # Smart deploy script:
-#   1. Compile CV (xelatex) so PDFs are up-to-date
+#   1. Build site (generator.py); this also recompiles the CV PDFs (xelatex)
+#      if their sources changed
 #   2. Commit all source changes to main (codex-generated message)
 #   3. Push main to remote
-#   4. Build site (generator.py) and push dist/ to gh-pages
+#   4. Commit dist/ to gh-pages and push it (publish.py)
 #
 # Usage: ./deploy.sh [commit message]
 #
@@ -17,26 +18,21 @@ BUILD_DIR="dist"
 REPO_ROOT="$(cd "$(dirname "$0")" && pwd)"
 cd "$REPO_ROOT"
 
-# ── Step 1: Compile CV ──
+# ── Step 1: Build site (and CV, when its sources changed) ──
 
-if command -v xelatex &>/dev/null; then
-    echo "==> Compiling CV..."
-    CV_DIR="CV-Overleaf"
-    for tex in main.tex main_zh.tex; do
-        if [ -f "$CV_DIR/$tex" ]; then
-            echo "    Compiling $tex..."
-            (cd "$CV_DIR" && xelatex -interaction=nonstopmode "$tex" >/dev/null 2>&1) || \
-                echo "    Warning: $tex compilation failed"
-        fi
-    done
-else
-    echo "==> Skipping CV compilation (xelatex not found)"
+echo "==> Building site..."
+# Deterministic, so gh-pages only gets commits for files that really changed
+python generator.py --optimize --deterministic
+
+if [ ! -d "$BUILD_DIR" ]; then
+    echo "Error: $BUILD_DIR not found. Build failed?"
+    exit 1
 fi
 
 # ── Step 2: Commit source changes (including fresh CV PDFs) ──
 
 echo "==> Checking for uncommitted changes..."
-git add -A
+git add -A -- . ":(exclude)$BUILD_DIR"  # the build output goes to gh-pages only
 
 if git diff --cached --quiet; then
     echo "    No changes to commit."
@@ -68,59 +64,11 @@ CURRENT_BRANCH=$(git symbolic-ref --short HEAD 2>/dev/null || echo "detached")
 echo "==> Pushing $CURRENT_BRANCH to origin..."
 git push origin "$CURRENT_BRANCH"
 
-# ── Step 4: Build site ──
-
-echo "==> Building site..."
-SKIP_CV_COMPILE=1 python generator.py
-
-if [ ! -d "$BUILD_DIR" ]; then
-    echo "Error: $BUILD_DIR not found. Build failed?"
-    exit 1
-fi
-
-# ── Step 5: Deploy to gh-pages ──
+# ── Step 4: Deploy to gh-pages ──
+# publish.py commits dist/ with git plumbing (no worktree, no copies): only
+# files that changed since the last deploy are hashed and written
 
 echo "==> Deploying to $DEPLOY_BRANCH..."
-
-TMPDIR=$(mktemp -d)
-cp -r "$BUILD_DIR"/. "$TMPDIR"/
-
-# Clean up any leftover worktree
-git worktree remove /tmp/_deploy_worktree 2>/dev/null || rm -rf /tmp/_deploy_worktree
-
-if git ls-remote --exit-code --heads origin "$DEPLOY_BRANCH" >/dev/null 2>&1; then
-    git fetch origin "$DEPLOY_BRANCH"
-    git worktree add /tmp/_deploy_worktree "$DEPLOY_BRANCH" 2>/dev/null || {
-        git worktree add --detach /tmp/_deploy_worktree origin/"$DEPLOY_BRANCH"
-        cd /tmp/_deploy_worktree
-        git checkout -B "$DEPLOY_BRANCH" origin/"$DEPLOY_BRANCH"
-    }
-    cd /tmp/_deploy_worktree
-    git reset --hard origin/"$DEPLOY_BRANCH" 2>/dev/null || true
-else
-    git worktree add --detach /tmp/_deploy_worktree 2>/dev/null || true
-    cd /tmp/_deploy_worktree
-    git checkout --orphan "$DEPLOY_BRANCH"
-    git rm -rf . >/dev/null 2>&1 || true
-fi
-
-# Clean and copy new build
-find . -maxdepth 1 ! -name '.git' ! -name '.' -exec rm -rf {} +
-cp -r "$TMPDIR"/. .
-
-git add -A
-if git diff --cached --quiet; then
-    echo "    No changes to deploy."
-else
-    DEPLOY_MSG="Deploy site $(date '+%Y-%m-%d %H:%M:%S')"
-    git commit -m "$DEPLOY_MSG"
-    git push origin "$DEPLOY_BRANCH"
-    echo "    Deployed to $DEPLOY_BRANCH successfully."
-fi
-
-# Cleanup
-cd "$REPO_ROOT"
-git worktree remove /tmp/_deploy_worktree 2>/dev/null || rm -rf /tmp/_deploy_worktree
-rm -rf "$TMPDIR"
+python publish.py --dir "$BUILD_DIR" --branch "$DEPLOY_BRANCH" --push origin
 
 echo "==> Done."
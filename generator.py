@@ -8,45 +8,1100 @@ Supports bilingual output (English + Chinese)
 import os
 import re
 import json
+import gzip
+import hashlib
+import pickle
+import stat
+import struct
+import argparse
 import yaml
-import markdown
 import subprocess
+import sys
+import tempfile
+import time
+import threading
+import traceback
+import unicodedata
+import urllib.parse
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Any
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Any
 import shutil
-from jinja2 import Environment, FileSystemLoader
+import filecmp
+import functools
+from markupsafe import Markup, escape
+# markdown, Pygments, Jinja2 and Pillow are imported where they are first
+# used, so runs that render nothing (--graph, up-to-date builds) don't pay
+# for them
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: without it only .gz files are precompressed
+    brotli = None
+
+MANIFEST_NAME = '.build-manifest.json'
+MANIFEST_VERSION = 2
+
+MARKDOWN_EXTENSIONS = [
+    'extra',
+    'meta',
+    'toc',
+    'tables',
+    'fenced_code',
+    'codehilite'
+]
+
+# Responsive image variants (widths in px) and the `sizes` hints for the
+# places they are shown, matching the layout in style.css
+IMAGE_WIDTHS = (480, 960, 1600)
+CARD_IMAGE_SIZES = "(max-width: 768px) 100vw, 400px"
+DETAIL_IMAGE_SIZES = "(max-width: 840px) 100vw, 800px"
+
+# Hex digits of the content hash in fingerprinted asset names (name.<hash>.ext)
+FINGERPRINT_LENGTH = 10
+
+# Text outputs that get precompressed .gz/.br siblings (--compress); smaller
+# files aren't worth a separate request-time lookup
+COMPRESS_SUFFIXES = ('.html', '.css', '.js', '.json', '.svg', '.xml', '.txt')
+COMPRESS_MIN_SIZE = 512
+
+# libyaml's parser when PyYAML was built with it (~10x faster)
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+# Sections with fewer entries are loaded serially even with --jobs: starting
+# a worker pool costs more than it saves
+PARALLEL_LOAD_MIN = 100
+
+# xelatex runs at most this many passes per CV (more only while it asks to rerun)
+CV_MAX_PASSES = 3
+
+# Full-text search index: terms are spread over SEARCH_SHARDS files by their
+# first character, so a query only fetches the shards of its own terms
+SEARCH_SHARDS = 8
+
+# Font Awesome icon of each skill (English and Chinese names)
+SKILL_ICONS = {
+    'Machine Learning/Deep Learning': 'python',
+    '机器学习/深度学习': 'python',
+    'Data Science': 'chart-line',
+    '数据科学': 'chart-line',
+    'System/Architecture': 'database',
+    '系统/架构': 'database',
+    'Phsyics': 'atom',
+    '物理': 'atom',
+    'Hiking': 'person-hiking',
+    '徒步': 'person-hiking',
+    'Reading': 'book',
+    '阅读': 'book',
+    'Writing': 'pen',
+    '写作': 'pen',
+    'Cloudherd': 'cloud',
+    '云牧': 'cloud',
+}
+
+# Icon packs vendored as SVG in templates/icons/<pack>/ (Font Awesome solid
+# and brands, Academicons), in the order they are searched for an icon
+# missing from the pack it was asked for
+ICON_PACKS = ('fas', 'fab', 'ai')
+_SVG_ICON = re.compile(r'<svg\b[^>]*\bviewBox="([^"]+)"[^>]*>(.*)</svg>', re.S)
+_SVG_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_ICON_USE = re.compile(r'<use href="#([\w-]+)">')
+
+
+def hash_listing(names: List[str]) -> str:
+    """Hash of a directory listing (sorted entry names)"""
+    return hashlib.sha256('\n'.join(names).encode('utf-8')).hexdigest()
+
+
+def hash_path(path: Path) -> str | None:
+    """Content hash of a file, or of the sorted entry names of a directory.
+
+    Directories are hashed by listing so that adding or removing a project,
+    publication or gallery image invalidates the pages that enumerate them.
+    Returns None for paths that do not exist.
+    """
+    if path.is_dir():
+        return hash_listing(sorted(entry.name for entry in path.iterdir()))
+    if path.is_file():
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    return None
+
+
+# LaTeX commands whose argument names a file the document depends on, and
+# the extensions tried for it
+_TEX_DEPENDENCY = re.compile(
+    r'\\(includegraphics|includepdf|include|input|subfile|documentclass|usepackage)\*?\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+_TEX_COMMENT = re.compile(r'(?<!\\)%.*')
+_TEX_EXTENSIONS = {
+    'input': ('.tex',),
+    'include': ('.tex',),
+    'subfile': ('.tex',),
+    'includegraphics': ('.pdf', '.png', '.jpg', '.jpeg', '.eps'),
+    'includepdf': ('.pdf',),
+    'documentclass': ('.cls',),
+    'usepackage': ('.sty',),
+}
+
+
+def tex_dependencies(tex_file: Path) -> List[Path]:
+    """The local files a LaTeX document is built from: itself, everything it
+    \\input/\\include/\\includegraphics (recursively) and class or package
+    files kept next to it. Names are resolved against the document's
+    directory, where xelatex runs; system packages are not tracked."""
+    root = tex_file.parent
+    found, pending = set(), [tex_file]
+    while pending:
+        source = pending.pop()
+        if source in found:
+            continue
+        found.add(source)
+        if source.suffix != '.tex':
+            continue
+        text = _TEX_COMMENT.sub('', source.read_text(encoding='utf-8', errors='replace'))
+        for command, names in _TEX_DEPENDENCY.findall(text):
+            for name in names.split(','):
+                name = name.strip()
+                if not name:
+                    continue
+                candidates = [root / name] + [root / (name + ext) for ext in _TEX_EXTENSIONS[command]]
+                path = next((c for c in candidates if c.is_file()), None)
+                if path is not None:
+                    pending.append(path)
+    return sorted(found)
+
+
+@contextmanager
+def atomic_write(path: Path, buffer_size: int = 1 << 16):
+    """Open path for buffered binary writing through a temporary file in the
+    same directory, renamed over path when the block completes. If the write
+    fails, path keeps its previous content and the temporary file is removed."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb', buffering=buffer_size) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def reflink_file(src: Path, dst: Path) -> bool:
+    """Clone src to dst copy-on-write (Linux FICLONE). False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    ficlone = 0x40049409
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), ficlone, fsrc.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def sync_file(src: Path, dst: Path, src_stat: os.stat_result = None, mtime_ns: int = None) -> str:
+    """Make dst a copy of src, doing as little I/O as possible.
+
+    Files whose size and mtime already match are left alone. Otherwise dst is
+    replaced by a hardlink, a reflink or (as a last resort) a copy that keeps
+    src's mtime. dst is always unlinked first and never written in place, so
+    a hardlinked output can't clobber its source.
+    src_stat saves a stat call when the caller already has it.
+
+    With mtime_ns (deterministic builds, see normalize_tree) dst gets that
+    mtime and mode 0644 instead. It is then only hardlinked to sources that
+    already have them (other outputs), and is unchanged if its content is:
+    an unshared dst with the right content only has its metadata fixed.
+    Returns the action taken: 'unchanged', 'linked', 'reflinked' or 'copied'.
+    """
+    if src_stat is None:
+        src_stat = src.stat()
+    try:
+        dst_stat = dst.stat()
+        if dst_stat.st_size == src_stat.st_size:
+            if mtime_ns is None:
+                if dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+                    return 'unchanged'
+            else:
+                normalized = dst_stat.st_mtime_ns == mtime_ns and dst_stat.st_mode & 0o777 == 0o644
+                if os.path.samestat(src_stat, dst_stat):
+                    if normalized:
+                        return 'unchanged'
+                elif (normalized or dst_stat.st_nlink == 1) and filecmp.cmp(src, dst, shallow=False):
+                    if not normalized:
+                        os.chmod(dst, 0o644)
+                        os.utime(dst, ns=(mtime_ns, mtime_ns))
+                    return 'unchanged'
+        dst.unlink()
+    except FileNotFoundError:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+
+    normalized = mtime_ns is None or (src_stat.st_mtime_ns == mtime_ns and src_stat.st_mode & 0o777 == 0o644)
+    if normalized:
+        try:
+            os.link(src, dst)
+            return 'linked'
+        except OSError:
+            pass
+    action = 'reflinked' if reflink_file(src, dst) else None
+    if action is None:
+        shutil.copy2(src, dst)
+        action = 'copied'
+    if mtime_ns is not None:
+        os.chmod(dst, 0o644)
+        os.utime(dst, ns=(mtime_ns, mtime_ns))
+    return action
+
+
+def source_date_epoch() -> int | None:
+    """Build timestamp from SOURCE_DATE_EPOCH (see reproducible-builds.org), if set"""
+    value = os.environ.get('SOURCE_DATE_EPOCH')
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"SOURCE_DATE_EPOCH must be a Unix timestamp, not {value!r}") from None
+
+
+# mtime of deterministic outputs when SOURCE_DATE_EPOCH isn't set
+# (1980-01-01, the earliest date zip archives can store). Fixed rather than
+# the last commit's time, which changes on every deploy and would retouch
+# every file.
+DETERMINISTIC_MTIME = 315532800
+
+
+def unshare_file(path: str):
+    """Replace a hardlinked file by a copy of its own, so changing its
+    metadata can't change the other links (e.g. a source in content/)"""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        if not reflink_file(Path(path), Path(tmp_path)):
+            shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def normalize_tree(root: Path, mtime_ns: int):
+    """Give every file under root mode 0644 and every directory 0755, and
+    all of them the same mtime, so the tree's metadata doesn't depend on
+    when or in which order it was built. Files that need changing and are
+    hardlinked (left by a non-deterministic build) are copied first, so
+    their sources are never touched."""
+    for dirpath, dirs, files in os.walk(root, topdown=False):
+        for name, mode in [(name, 0o644) for name in files] + [(name, 0o755) for name in dirs] + [('', 0o755)]:
+            path = os.path.join(dirpath, name) if name else dirpath
+            st = os.lstat(path)
+            if stat.S_ISLNK(st.st_mode):
+                continue
+            if stat.S_ISREG(st.st_mode) and st.st_nlink > 1 and \
+                    (st.st_mode & 0o777 != mode or st.st_mtime_ns != mtime_ns):
+                unshare_file(path)
+                st = os.lstat(path)
+            if st.st_mode & 0o777 != mode:
+                os.chmod(path, mode)
+            if st.st_mtime_ns != mtime_ns:
+                os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def compare_trees(left: Path, right: Path) -> List[str]:
+    """Differences between two directory trees (content, mode and mtime of
+    every file), one line each"""
+    def snapshot(root):
+        entries = {}
+        for dirpath, dirs, files in os.walk(root):
+            for name in dirs + files:
+                path = os.path.join(dirpath, name)
+                entries[os.path.relpath(path, root)] = os.lstat(path)
+        return entries
+
+    a, b = snapshot(left), snapshot(right)
+    diffs = []
+    for rel in sorted(a.keys() | b.keys()):
+        if rel not in b or rel not in a:
+            diffs.append(f"{rel}: only in {left if rel in a else right}")
+        elif stat.S_IMODE(a[rel].st_mode) != stat.S_IMODE(b[rel].st_mode):
+            diffs.append(f"{rel}: mode {stat.S_IMODE(a[rel].st_mode):o} != {stat.S_IMODE(b[rel].st_mode):o}")
+        elif a[rel].st_mtime_ns != b[rel].st_mtime_ns:
+            diffs.append(f"{rel}: mtime differs")
+        elif stat.S_ISREG(a[rel].st_mode) and not filecmp.cmp(left / rel, right / rel, shallow=False):
+            diffs.append(f"{rel}: content differs")
+    return diffs
+
+
+@functools.cache
+def pillow():
+    """The PIL.Image module, imported on first use. None when Pillow isn't
+    installed (it is optional: without it images are shipped as-is)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _encode_image_variant(src: str, dst: str, width: int, fmt: str) -> str:
+    """Worker pool entry point: write a resized copy of an image as WebP/AVIF"""
+    Image = pillow()
+    with Image.open(src) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        if width < img.width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        tmp_path = f"{dst}.{os.getpid()}.tmp"
+        if fmt == 'avif':
+            img.save(tmp_path, 'AVIF', quality=60, speed=8)
+        else:
+            img.save(tmp_path, 'WEBP', quality=80, method=6)
+    os.replace(tmp_path, dst)
+    return dst
+
+
+def _compress_file(path: str, formats: List[str]) -> Dict[str, int]:
+    """Worker pool entry point: write path.gz (and path.br) at maximum
+    compression. Returns the size of each variant."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    sizes = {}
+    for fmt in formats:
+        if fmt == 'br':
+            packed = brotli.compress(data, quality=11)
+        else:
+            packed = gzip.compress(data, compresslevel=9, mtime=0)
+        tmp_path = f"{path}.{fmt}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(packed)
+        os.replace(tmp_path, f"{path}.{fmt}")
+        sizes[fmt] = len(packed)
+    return sizes
+
+
+# Minification and critical CSS (--optimize). Conservative by design: CSS
+# strings, <pre>/<textarea> contents and JS line structure are left intact.
+_CSS_STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_RAW_HTML_BLOCK = re.compile(r'<(pre|textarea|script|style)\b([^>]*)>(.*?)</\1\s*>', re.S | re.I)
+_HTML_BLOCK_TAG = re.compile(
+    r'\s*(</?(?:html|head|body|meta|link|title|div|section|article|nav|header|footer|main|'
+    r'ul|ol|li|p|h[1-6]|table|thead|tbody|tr|td|th|br|hr|noscript|form|picture|source)\b[^>]*>)\s*', re.I)
+_CSS_PSEUDO = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+FOLD_MARKER = '<!-- fold -->'
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    parts = _CSS_STRING.split(re.sub(r'/\*.*?\*/', '', css, flags=re.S))
+    for i in range(0, len(parts), 2):  # even parts are outside strings
+        text = re.sub(r'\s+', ' ', parts[i])
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        parts[i] = re.sub(r':\s+', ':', text).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(js: str) -> str:
+    """Drop comment-only lines, indentation and blank lines.
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected.
+    """
+    js = re.sub(r'^\s*/\*.*?\*/', '', js, flags=re.S | re.M)
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace and drop comments, minifying inline CSS and JS"""
+    def collapse(text):
+        text = re.sub(r'<!--(?!\[if).*?-->', '', text, flags=re.S)
+        return _HTML_BLOCK_TAG.sub(r'\1', re.sub(r'\s+', ' ', text))
+
+    out = []
+    pos = 0
+    for match in _RAW_HTML_BLOCK.finditer(html):
+        out.append(collapse(html[pos:match.start()]))
+        tag, attrs, body = match.groups()
+        if tag.lower() == 'style':
+            body = minify_css(body)
+        elif tag.lower() == 'script' and 'src=' not in attrs:
+            body = minify_js(body)
+        out.append(f'<{tag}{attrs}>{body}</{tag}>')
+        pos = match.end()
+    out.append(collapse(html[pos:]))
+    return ''.join(out).strip()
+
+
+def _css_blocks(css: str) -> List[tuple[str, str]]:
+    """Split minified CSS into top-level (prelude, body) blocks"""
+    blocks = []
+    pos = 0
+    while True:
+        start = css.find('{', pos)
+        if start < 0:
+            return blocks
+        depth, end = 0, start
+        while end < len(css):
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            end += 1
+        # Statements such as @charset end with ';' and have no block
+        blocks.append((css[pos:start].rsplit(';', 1)[-1].strip(), css[start + 1:end]))
+        pos = end + 1
+
+
+def html_tokens(html: str) -> Dict[str, set]:
+    """Tag names, classes, ids and attribute names used in some HTML"""
+    return {
+        'tags': {tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', html)},
+        'classes': {name for value in re.findall(r'\sclass="([^"]*)"', html) for name in value.split()},
+        'ids': set(re.findall(r'\sid="([^"]*)"', html)),
+        # data-theme is set on <html> by script.js
+        'attrs': set(re.findall(r'\s([\w-]+)=', html)) | {'data-theme'},
+    }
+
+
+def _selector_used(selector: str, tokens: Dict[str, set]) -> bool:
+    """Whether every class, id, attribute and tag of a selector occurs in the
+    page. Pseudo-classes are ignored, so :hover/:not() rules are kept."""
+    selector = _CSS_PSEUDO.sub('', selector)
+    if not set(re.findall(r'\.([\w-]+)', selector)) <= tokens['classes']:
+        return False
+    if not set(re.findall(r'#([\w-]+)', selector)) <= tokens['ids']:
+        return False
+    if not set(re.findall(r'\[([\w-]+)', selector)) <= tokens['attrs']:
+        return False
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    tags = {tag.lower() for tag in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', selector)}
+    return tags <= tokens['tags']
+
+
+def critical_css(css: str, tokens: Dict[str, set]) -> str:
+    """The rules of a minified stylesheet that can apply to a page's tokens.
+
+    @media/@supports blocks are filtered recursively, @font-face is kept and
+    other at-rules (@keyframes, ...) are left to the full stylesheet.
+    """
+    out = []
+    for prelude, body in _css_blocks(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = critical_css(body, tokens)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            out.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@'):
+            continue
+        elif any(_selector_used(sel, tokens) for sel in prelude.split(',')):
+            out.append(f'{prelude}{{{body}}}')
+    return ''.join(out)
+
+
+_SEARCH_WORD = re.compile(r'[^\W_]+')
+# Kana, CJK ideographs and Hangul: written without spaces, indexed as bigrams
+_CJK_RUN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+')
+# Link targets, raw HTML and bare URLs in markdown bodies
+_MARKDOWN_NOISE = re.compile(r'\]\([^)]*\)|<[^>]+>|https?://\S+')
+
+
+def search_tokens(text: str) -> List[str]:
+    """Split text into search terms (mirrors searchTokens() in script.js).
+
+    Words are NFKC-normalized and lowercased. Runs of CJK characters become
+    overlapping bigrams (a lone character stays a unigram), so Chinese text
+    is searchable without a dictionary.
+    """
+    tokens = []
+    for word in _SEARCH_WORD.findall(unicodedata.normalize('NFKC', text).lower()):
+        pos = 0
+        for run in _CJK_RUN.finditer(word):
+            if run.start() > pos:
+                tokens.append(word[pos:run.start()])
+            chars = run.group()
+            tokens += [chars[i:i + 2] for i in range(len(chars) - 1)] or [chars]
+            pos = run.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+def search_shard(term: str) -> int:
+    """Shard file holding a term (mirrors searchShard() in script.js)"""
+    return ord(term[0]) % SEARCH_SHARDS
+
+
+class MarkdownCache:
+    """Parse-once cache for markdown files and snippets.
+
+    Entries are pickled to <cache_dir>/<key>.pickle, where the key hashes the
+    source text together with the markdown extension configuration, so only
+    new or edited markdown pays for conversion and Pygments highlighting.
+    Entries are also kept in memory for the current run. Entries used by the
+    current run (see begin_run) are never evicted, whatever the size of the
+    site; beyond that, older entries are evicted least-recently-used (by
+    mtime, refreshed on every hit) once there are more than max_entries.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 2048):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory = {}
+        self._config_key = None
+        self.begin_run()
+
+    def begin_run(self):
+        """Start tracking the entries a build uses: those hit or stored in
+        this process, and (for pool workers) those whose file was refreshed
+        since now"""
+        self.run_start_ns = time.time_ns()
+        self.touched = set()
+
+    @property
+    def config_key(self) -> str:
+        """Markdown configuration rendered entries depend on (imports markdown)"""
+        if self._config_key is None:
+            import markdown
+            import pygments
+            self._config_key = json.dumps({
+                'extensions': MARKDOWN_EXTENSIONS,
+                'markdown': markdown.__version__,
+                'pygments': pygments.__version__,
+            }, sort_keys=True)
+        return self._config_key
+
+    def key(self, kind: str, text: str) -> str:
+        """Cache key of a source text for a kind of entry ('frontmatter', 'body', 'snippet' or 'search').
+
+        Only 'body' and 'snippet' entries are markdown output, so only their
+        keys include the markdown configuration.
+        """
+        config = self.config_key if kind in ('body', 'snippet') else ''
+        digest = hashlib.sha256(f"{config}\0{kind}\0".encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Return a fresh copy of a cached value, or None on a miss"""
+        self.touched.add(key)
+        data = self.memory.get(key)
+        if data is None:
+            path = self.cache_dir / f"{key}.pickle"
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                return None
+            self.memory[key] = data
+        try:
+            return pickle.loads(data)
+        except Exception:
+            return None
+
+    def put(self, key: str, value):
+        """Store a value in memory and on disk (written atomically)"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.memory[key] = data
+        self.touched.add(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.cache_dir / f"{key}.pickle")
+        except OSError as exc:
+            print(f"Warning: could not write markdown cache entry: {exc}")
+
+    def prune(self):
+        """Evict the least recently used disk entries that this run didn't
+        use, keeping at most max_entries in total (or all the used ones)"""
+        if not self.cache_dir.exists():
+            return
+        live, unused = 0, []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.pickle'):
+                continue
+            mtime = entry.stat().st_mtime_ns
+            if entry.name[:-len('.pickle')] in self.touched or mtime >= self.run_start_ns:
+                live += 1
+            else:
+                unused.append((mtime, entry.path))
+        unused.sort(reverse=True)
+        for _, path in unused[max(self.max_entries - live, 0):]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class ContentError(ValueError):
+    """A content file that can't be loaded; the message starts with file:line"""
+
+
+class BuildError(RuntimeError):
+    """A build that failed after reporting why (no traceback needed)"""
+
+
+@dataclass(slots=True, kw_only=True)
+class Document:
+    """A markdown file: its frontmatter plus a body rendered on first use.
+
+    Frontmatter fields can be read as attributes (doc.title), so templates
+    treat records like plain mappings; missing fields are undefined.
+    """
+    source: Path
+    meta: dict
+    body: str = ''
+    render: Callable[['Document'], str] = field(default=None, repr=False, compare=False)
+    _html: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __getattr__(self, name):
+        # Only reached for names that aren't fields or properties
+        if name.startswith('_') or name == 'meta':
+            raise AttributeError(name)
+        try:
+            return self.meta[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, key: str, default=None):
+        return self.meta.get(key, default)
+
+    @property
+    def content_html(self) -> str:
+        if self._html is None:
+            self._html = self.render(self) if self.body else ''
+        return self._html
+
+
+@dataclass(slots=True, kw_only=True)
+class Author(Document):
+    avatar: str | None = None
+
+
+@dataclass(slots=True, kw_only=True)
+class Publication(Document):
+    slug: str
+    featured_image: str | None = None
+    assets: List[str] = field(default_factory=list)  # output paths of the entry's files
+
+    @property
+    def date(self) -> str:
+        return self.meta.get('date', '')
+
+
+@dataclass(slots=True, kw_only=True)
+class Project(Publication):
+    images: List[str] = field(default_factory=list)  # gallery, as output paths
+
+
+class ContentIndex:
+    """Snapshot of the content tree taken in a single os.scandir pass.
+
+    Records the sorted entry names of every directory and the stat of every
+    file, so loading, dependency planning and asset sync don't list or stat
+    the tree again. Paths are strings built like str(Path(...)).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.listings = {}  # directory -> sorted entry names
+        self.stats = {}     # file -> os.stat_result
+        self.scan(str(root))
+
+    def scan(self, directory: str):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir():
+                self.scan(entry.path)
+            else:
+                self.stats[entry.path] = entry.stat()
+        self.listings[directory] = sorted(entry.name for entry in entries)
+
+    def listing(self, path) -> List[str] | None:
+        """Sorted entry names of a directory, or None if it isn't one"""
+        return self.listings.get(str(path))
+
+    def stat(self, path):
+        """stat of a file, or None if it isn't one"""
+        return self.stats.get(str(path))
+
+    def is_file(self, path) -> bool:
+        return str(path) in self.stats
+
+    def entries(self, section: str) -> List[str]:
+        """Slugs of all entries in <root>/<section>/ that have an index.md"""
+        section_dir = self.root / section
+        return [name for name in self.listing(section_dir) or []
+                if self.is_file(section_dir / name / "index.md")]
+
+
+class ChangeWatcher:
+    """Block until files under a set of directories change.
+
+    Uses watchdog (inotify/FSEvents/...) to wake up when it is installed and
+    falls back to polling otherwise. Either way a change is only reported
+    when a file's mtime or size differs, so reads and hardlinks made by the
+    build itself don't trigger rebuilds.
+    """
+
+    IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp', '.part')
+
+    def __init__(self, paths: List[Path], interval: float = 0.25):
+        self.paths = [p for p in paths if p.exists()]
+        self.interval = interval
+        self.event = threading.Event()
+        self.snapshot = self.scan()
+        self.observer = None
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+
+        event = self.event
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, fs_event):
+                if fs_event.event_type in ('created', 'deleted', 'modified', 'moved', 'closed'):
+                    event.set()
+
+        self.observer = Observer()
+        for path in self.paths:
+            self.observer.schedule(Handler(), str(path), recursive=True)
+        self.observer.start()
+
+    @property
+    def backend(self) -> str:
+        return 'watchdog' if self.observer else 'polling'
+
+    def scan(self) -> Dict[str, tuple]:
+        """Map every watched file to its (mtime, size)"""
+        snapshot = {}
+        for root_path in self.paths:
+            for root, dirs, files in os.walk(root_path):
+                for name in files:
+                    if name.endswith(self.IGNORED_SUFFIXES):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self) -> set:
+        """Wait for the next batch of changes and return the changed paths"""
+        while True:
+            if self.observer:
+                self.event.wait()
+                # Let editors finish writing (save = truncate + write + rename)
+                time.sleep(0.05)
+                self.event.clear()
+            else:
+                time.sleep(self.interval)
+            snapshot = self.scan()
+            changed = {path for path in set(snapshot) | set(self.snapshot)
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Static file handler that injects a live-reload client into HTML pages.
+
+    Pages subscribe to /__livereload (server-sent events) and reload when the
+    server's build version changes. Nothing is written into the output dir.
+    """
+
+    reload_state = None  # shared LiveReloadState, set by PersonalHomepageGenerator.serve
+
+    RELOAD_SCRIPT = (b'<script>new EventSource("/__livereload").onmessage = '
+                     b'function () { location.reload(); };</script>')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/__livereload':
+            self.send_events()
+            return
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            if not urllib.parse.urlsplit(self.path).path.endswith('/'):
+                # The base class answers with a 301 to the trailing-slash URL,
+                # so relative links resolve inside the directory
+                super().do_GET()
+                return
+            path = path / 'index.html'
+        if path.suffix != '.html' or not path.is_file():
+            super().do_GET()
+            return
+
+        body = path.read_bytes()
+        if b'</body>' in body:
+            body = body.replace(b'</body>', self.RELOAD_SCRIPT + b'</body>', 1)
+        else:
+            body += self.RELOAD_SCRIPT
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        version = self.reload_state.version
+        try:
+            while True:
+                new_version = self.reload_state.wait(version, timeout=15)
+                if new_version != version:
+                    self.wfile.write(b'data: reload\n\n')
+                    version = new_version
+                else:
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class LiveReloadState:
+    """Build counter that live-reload connections wait on"""
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def bump(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+
+class BuildProfiler:
+    """Record wall time, CPU time and bytes written per build phase, page and
+    markdown file.
+
+    Spans nest; bytes and CPU time are attributed to every open span of the
+    thread doing the work. Worker processes record into their forked copy and
+    hand their events back with each finished page (see absorb). Results can
+    be printed as a table (report) or saved as a Chrome trace (write_trace,
+    open in chrome://tracing or Perfetto).
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events = []
+        self.pid = os.getpid()
+        self.local = threading.local()
+
+    def _counters(self):
+        if not hasattr(self.local, 'bytes'):
+            self.local.bytes = 0
+            self.local.extra_cpu = 0.0
+        return self.local
+
+    def add_bytes(self, count: int):
+        if self.enabled:
+            self._counters().bytes += count
+
+    @contextmanager
+    def span(self, name: str, category: str = 'phase', **args):
+        """Time the enclosed block as one event"""
+        if not self.enabled:
+            yield
+            return
+        counters = self._counters()
+        start_bytes, start_extra_cpu = counters.bytes, counters.extra_cpu
+        start_cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append({
+                'name': name,
+                'cat': category,
+                'ts': start,
+                'dur': time.perf_counter() - start,
+                'cpu': time.thread_time() - start_cpu + counters.extra_cpu - start_extra_cpu,
+                'bytes': counters.bytes - start_bytes,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+
+    def absorb(self, events: List[dict]):
+        """Merge events recorded by a worker process into this profiler"""
+        if not self.enabled or not events:
+            return
+        counters = self._counters()
+        for event in events:
+            if event['cat'] == 'page':
+                counters.bytes += event['bytes']
+                counters.extra_cpu += event['cpu']
+        self.events.extend(events)
+
+    def report(self, top: int = 10) -> str:
+        """Format phase totals, page kinds and the slowest pages/markdown files"""
+        def table(title, rows):
+            lines = [f"{title:<44} {'wall ms':>9} {'cpu ms':>9} {'KiB':>9} {'count':>6}"]
+            for name, wall, cpu, written, count in rows:
+                lines.append(f"{name[:44]:<44} {wall * 1000:9.1f} {cpu * 1000:9.1f} "
+                             f"{written / 1024:9.1f} {count:6d}")
+            return '\n'.join(lines)
+
+        def grouped(events, key):
+            groups = {}
+            for event in events:
+                wall, cpu, written, count = groups.get(key(event), (0.0, 0.0, 0, 0))
+                groups[key(event)] = (wall + event['dur'], cpu + event['cpu'],
+                                      written + event['bytes'], count + 1)
+            return [(name, *values) for name, values in groups.items()]
+
+        def slowest(events):
+            events = sorted(events, key=lambda e: e['dur'], reverse=True)[:top]
+            return [(e['name'], e['dur'], e['cpu'], e['bytes'], 1) for e in events]
+
+        phases = [e for e in self.events if e['cat'] == 'phase']
+        pages = [e for e in self.events if e['cat'] == 'page']
+        markdown_files = [e for e in self.events if e['cat'] == 'markdown']
+        phase_order = {}
+        for event in sorted(phases, key=lambda e: e['ts']):
+            phase_order.setdefault(event['name'], len(phase_order))
+        sections = [
+            table('Phase', sorted(grouped(phases, lambda e: e['name']), key=lambda r: phase_order[r[0]])),
+            table('Pages by kind', sorted(grouped(pages, lambda e: e['args'].get('kind', '?')))),
+            table(f'Slowest pages (top {top})', slowest(pages)),
+            table(f'Slowest markdown files (top {top})', slowest(markdown_files)),
+        ]
+        return '\n\n'.join(sections)
+
+    def write_trace(self, path: Path):
+        """Save the events in Chrome trace event format"""
+        origin = min((e['ts'] for e in self.events), default=0)
+        trace = [{
+            'name': e['name'],
+            'cat': e['cat'],
+            'ph': 'X',
+            'ts': round((e['ts'] - origin) * 1e6),
+            'dur': round(e['dur'] * 1e6),
+            'pid': e['pid'],
+            'tid': e['tid'],
+            'args': {'cpu_ms': round(e['cpu'] * 1000, 3), 'bytes': e['bytes'], **e['args']},
+        } for e in self.events]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+
+# Generator shared with pool workers. Process workers are forked after it is
+# set, so they inherit the loaded content without pickling it.
+_pool_generator = None
+
+
+def _read_markdown_task(path: Path, generator=None) -> tuple[dict, str] | ContentError:
+    """Worker pool entry point: read a markdown file's frontmatter and body.
+    Errors are returned rather than raised, so all of them get reported."""
+    try:
+        return (generator or _pool_generator).read_markdown_file(path)
+    except ContentError as exc:
+        return exc
+
+
+def _render_page_task(output: str) -> List[dict]:
+    """Worker pool entry point: render one page of the current build.
+
+    Returns the profiler events recorded for the page when running in a
+    worker process (thread workers record into the shared profiler).
+    """
+    profiler = _pool_generator.profiler
+    start = len(profiler.events)
+    _pool_generator.build_page(output)
+    if os.getpid() == profiler.pid:
+        return []
+    return profiler.events[start:]
 
 
 class PersonalHomepageGenerator:
     SUPPORTED_LANGS = ['en', 'zh']
     DEFAULT_LANG = 'en'
-
-    def __init__(self, content_dir: str = "content", output_dir: str = "dist", template_dir: str = "templates"):
+    # Number of items previewed on the index page
+    INDEX_PUBLICATIONS = 10
+    INDEX_PROJECTS = 6
+    # Items rendered into the listing pages; the rest load from their JSON index
+    PUBLICATIONS_PAGE_SIZE = 20
+    PROJECTS_PAGE_SIZE = 12
+
+    def __init__(self, content_dir: str = "content", output_dir: str = "dist", template_dir: str = "templates",
+                 cache_dir: str = ".build-cache"):
         self.content_dir = Path(content_dir)
         self.output_dir = Path(output_dir)
         self.template_dir = Path(template_dir)
         self.i18n_dir = Path("i18n")
-
-        # Initialize Jinja2
-        self.env = Environment(loader=FileSystemLoader(self.template_dir))
-
-        # Initialize markdown parser with extensions
-        self.md = markdown.Markdown(extensions=[
-            'extra',
-            'meta',
-            'toc',
-            'tables',
-            'fenced_code',
-            'codehilite'
-        ])
-
-        # Data storage (per language)
-        self.author_data = {}
+        self.cv_dir = Path("CV-Overleaf")
+        self.icon_dir = self.template_dir / "icons"
+        self.cache_dir = Path(cache_dir)
+
+        # Jinja2 environment, created on first use (see env)
+        self._env = None
+
+        # Markdown parsers are stateful, so each worker thread gets its own
+        self._md_local = threading.local()
+        # Icons used by the file being written, per thread (see icon)
+        self._icon_local = threading.local()
+        self.markdown_cache = MarkdownCache(self.cache_dir / "markdown")
+        self.profiler = BuildProfiler()
+
+        # Data storage (author data is per language, the rest is shared)
+        self.content = None             # ContentIndex of content_dir, see scan_content
+        self.authors = {}
         self.publications = []
         self.projects = []
-        self.config = {}
+        self.config = None              # site config, see get_config
         self.translations = {}
+        self.images = {}                # image path -> size and responsive variants
+        self.image_variant_files = []   # (cached variant, path in output tree)
+        self.asset_map = {}             # asset path -> fingerprinted path, see fingerprint_assets
+        self.search_indexes = {}        # lang -> (result records, term postings), see search_index
+        self.fragments = {}             # rendered list items with placeholders, see fragment
+        self.icon_ids = {}              # (pack, name) -> vendored icon id, see find_icon
+        self.icons = {}                 # icon id -> (viewBox, SVG content)
+
+        # Incremental build state
+        self.manifest = {'inputs': {}, 'outputs': {}}
+        self.input_hashes = {}
+        self.stale_outputs = None  # None means every page is built
+        self.compressed = {}       # output file -> hash and sizes, see compress_outputs
+        self.optimize = False      # minify and inline critical CSS, see optimize_html
+        self.cv = True             # compile the CV and publish CV-Overleaf/main.pdf, see collect_cv
+        self.build_date = datetime.now()  # the footer's year, see set_build_date
+        self.output_mtime_ns = None       # mtime of every output in deterministic builds
 
     def load_translations(self):
         """Load translation files for all supported languages"""
@@ -54,229 +1109,500 @@ class PersonalHomepageGenerator:
             lang_file = self.i18n_dir / f"{lang}.yml"
             if lang_file.exists():
                 with open(lang_file, 'r', encoding='utf-8') as f:
-                    self.translations[lang] = yaml.safe_load(f)
+                    self.translations[lang] = yaml.load(f, Loader=YAML_LOADER)
             else:
                 self.translations[lang] = {}
 
+    @property
+    def env(self):
+        """Jinja2 environment. Page fragments are macros (templates/macros.html);
+        compiled templates are cached across runs."""
+        if self._env is None:
+            from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+            jinja_cache_dir = self.cache_dir / "jinja"
+            jinja_cache_dir.mkdir(parents=True, exist_ok=True)
+            env = Environment(
+                loader=FileSystemLoader(self.template_dir),
+                autoescape=select_autoescape(['html']),
+                bytecode_cache=FileSystemBytecodeCache(str(jinja_cache_dir)),
+            )
+            env.filters['markdown_inline'] = self.markdown_inline
+            env.globals.update({
+                'venue_status': self.venue_status,
+                'publication_year': self.publication_year,
+                'image_info': self.image_info,
+                'asset_path': self.asset_path,
+                'publication_item': self.publication_item,
+                'icon': self.icon,
+                'icon_sprite': self.icon_sprite,
+                'fold': self.fold_marker,
+                'project_card': self.project_card,
+                'skill_icons': SKILL_ICONS,
+                'card_image_sizes': CARD_IMAGE_SIZES,
+                'detail_image_sizes': DETAIL_IMAGE_SIZES,
+            })
+            self._env = env
+        return self._env
+
+    def get_markdown(self):
+        """Markdown parser with our extensions for the calling thread"""
+        md = getattr(self._md_local, 'md', None)
+        if md is None:
+            import markdown
+            md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+            self._md_local.md = md
+        md.reset()
+        return md
+
     def get_translations(self, lang: str) -> dict:
         """Get translation dictionary for a language"""
         return self.translations.get(lang, self.translations.get(self.DEFAULT_LANG, {}))
 
-    def parse_frontmatter(self, content: str) -> tuple[dict, str]:
-        """Extract YAML frontmatter and content from markdown file"""
+    def parse_frontmatter(self, content: str, source: Path = None) -> tuple[dict, str]:
+        """Extract YAML frontmatter and content from markdown file.
+
+        Only the frontmatter is parsed, once per distinct frontmatter text
+        (cached), so editing the body of a file costs no YAML parsing. The
+        body is returned as markdown; it is rendered when a page needs it
+        (see Document.content_html). Invalid frontmatter raises ContentError
+        with the line in source it was found at.
+        """
         if content.startswith('---'):
-            try:
-                parts = content.split('---', 2)[1:]
-                if len(parts) == 2:
-                    frontmatter = yaml.safe_load(parts[0])
-                    body = parts[1].strip()
-                    return frontmatter or {}, body
-            except:
-                pass
+            parts = content.split('---', 2)[1:]
+            if len(parts) == 2:
+                key = self.markdown_cache.key('frontmatter', parts[0])
+                frontmatter = self.markdown_cache.get(key)
+                if frontmatter is None:
+                    try:
+                        frontmatter = yaml.load(parts[0], Loader=YAML_LOADER) or {}
+                    except yaml.YAMLError as exc:
+                        # The frontmatter text starts on the opening '---' line
+                        mark = getattr(exc, 'problem_mark', None)
+                        line = mark.line + 1 if mark else 1
+                        problem = getattr(exc, 'problem', None) or str(exc)
+                        raise ContentError(f"{source}:{line}: invalid frontmatter: {problem}") from exc
+                    if not isinstance(frontmatter, dict):
+                        raise ContentError(f"{source}:1: frontmatter is not a mapping")
+                    self.markdown_cache.put(key, frontmatter)
+                return frontmatter, parts[1].strip()
         return {}, content
 
-    def read_markdown_file(self, filepath: Path) -> dict:
-        """Read and parse a markdown file with frontmatter"""
+    def read_markdown_file(self, filepath: Path) -> tuple[dict, str]:
+        """Read a markdown file's frontmatter and (unrendered) body"""
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+            return self.parse_frontmatter(f.read(), filepath)
 
-        meta, body = self.parse_frontmatter(content)
-        self.md.reset()
-        meta['content_html'] = self.md.convert(body)
-        meta['content_raw'] = body
+    def read_markdown_files(self, paths: List[Path], jobs: int = 1) -> List[tuple[dict, str]]:
+        """read_markdown_file for many files, in order, on a worker pool when
+        jobs > 1 and there are at least PARALLEL_LOAD_MIN of them.
 
-        return meta
+        Every file that fails to load is reported before loading is aborted.
+        """
+        global _pool_generator
+        if jobs <= 1 or len(paths) < PARALLEL_LOAD_MIN:
+            results = [_read_markdown_task(path, self) for path in paths]
+        else:
+            _pool_generator = self
+            try:
+                with self.make_pool(jobs) as pool:
+                    results = list(pool.map(_read_markdown_task, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+            finally:
+                _pool_generator = None
+
+        failures = [result for result in results if isinstance(result, ContentError)]
+        if failures:
+            for exc in failures:
+                print(f"Error: {exc}")
+            raise BuildError(f"{len(failures)} content file(s) failed to load")
+        return results
+
+    def render_document(self, doc: Document) -> str:
+        """Convert a document body to HTML (see Document.content_html)"""
+        key = self.markdown_cache.key('body', doc.body)
+        html = self.markdown_cache.get(key)
+        if html is None:
+            with self.profiler.span(str(doc.source), 'markdown'):
+                html = self.get_markdown().convert(doc.body)
+                self.markdown_cache.put(key, html)
+        return html
 
-    def load_author_data(self, lang: str = 'en'):
-        """Load author information, preferring language-specific file"""
-        # Try language-specific file first
-        if lang != self.DEFAULT_LANG:
-            lang_file = self.content_dir / "authors" / "admin" / f"_index.{lang}.md"
-            if lang_file.exists():
-                self.author_data = self.read_markdown_file(lang_file)
-                avatar_path = lang_file.parent / "avatar.jpg"
-                if avatar_path.exists():
-                    self.author_data['avatar'] = "avatar.jpg"
-                return
+    def render_markdown(self, text: str) -> str:
+        """Convert a markdown snippet (e.g. a summary) to HTML, cached by content hash"""
+        key = self.markdown_cache.key('snippet', text)
+        html = self.markdown_cache.get(key)
+        if html is None:
+            html = self.get_markdown().convert(text)
+            self.markdown_cache.put(key, html)
+        return html
 
-        # Fallback to default
-        author_file = self.content_dir / "authors" / "admin" / "_index.md"
-        if author_file.exists():
-            self.author_data = self.read_markdown_file(author_file)
-            avatar_path = author_file.parent / "avatar.jpg"
-            if avatar_path.exists():
-                self.author_data['avatar'] = "avatar.jpg"
+    def read_document(self, filepath: Path, cls=Document, **fields) -> Document:
+        """Load a markdown file as a record of the given Document class"""
+        meta, body = self.read_markdown_file(filepath)
+        return cls(source=filepath, meta=meta, body=body, render=self.render_document, **fields)
 
-    def load_publications(self):
-        """Load all publications from content/publication/"""
-        self.publications = []
-        pub_dir = self.content_dir / "publication"
-        if pub_dir.exists():
-            for item in pub_dir.iterdir():
-                if item.is_dir():
-                    index_file = item / "index.md"
-                    if index_file.exists():
-                        pub_data = self.read_markdown_file(index_file)
-                        pub_data['slug'] = item.name
-
-                        # Check for featured image
-                        featured_img = item / "featured.png"
-                        if featured_img.exists():
-                            pub_data['featured_image'] = f"publication/{item.name}/featured.png"
-
-                        self.publications.append(pub_data)
+    def scan_content(self):
+        """Index the content tree (see ContentIndex)"""
+        self.content = ContentIndex(self.content_dir)
+
+    def load_author_data(self, lang: str = 'en') -> Author:
+        """Load author information, preferring language-specific file"""
+        author_file = self.author_file(lang)
+        if self.content.is_file(author_file):
+            avatar = "avatar.jpg" if self.content.is_file(author_file.parent / "avatar.jpg") else None
+            author_data = self.read_document(author_file, Author, avatar=avatar)
+        else:
+            author_data = Author(source=author_file, meta={})
+        self.authors[lang] = author_data
+        return author_data
+
+    def get_author_data(self, lang: str) -> Author:
+        """Author information for a language, loaded on first use"""
+        if lang not in self.authors:
+            self.load_author_data(lang)
+        return self.authors[lang]
+
+    def load_entries(self, section: str, cls, jobs: int = 1) -> list:
+        """Load every entry of content/<section>/ as a record, newest first.
+
+        Files are parsed in slug order (on a worker pool when jobs > 1) and
+        the date sort is stable, so entries with the same date stay in slug
+        order whatever the scheduling.
+        """
+        entries = []
+        section_dir = self.content_dir / section
+        slugs = self.content.entries(section)
+        documents = self.read_markdown_files([section_dir / slug / "index.md" for slug in slugs], jobs)
+        for slug, (meta, body) in zip(slugs, documents):
+            item = section_dir / slug
+            files = self.content.listing(item)
+            entry = cls(source=item / "index.md", meta=meta, body=body, render=self.render_document, slug=slug)
+            if "featured.png" in files:
+                entry.featured_image = f"{section}/{slug}/featured.png"
+            entry.assets = [f"{section}/{slug}/{name}" for name in files
+                            if name.lower().endswith(('.png', '.jpg', '.jpeg'))
+                            and self.content.is_file(item / name)]
+            entries.append(entry)
 
         # Sort by date (newest first)
-        self.publications.sort(key=lambda x: x.get('date', ''), reverse=True)
+        entries.sort(key=lambda x: x.date, reverse=True)
+        return entries
 
-    def load_projects(self):
-        """Load all projects from content/project/"""
-        self.projects = []
-        proj_dir = self.content_dir / "project"
-        if proj_dir.exists():
-            for item in proj_dir.iterdir():
-                if item.is_dir():
-                    index_file = item / "index.md"
-                    if index_file.exists():
-                        proj_data = self.read_markdown_file(index_file)
-                        proj_data['slug'] = item.name
-
-                        # Check for featured image
-                        featured_img = item / "featured.png"
-                        if featured_img.exists():
-                            proj_data['featured_image'] = f"project/{item.name}/featured.png"
-
-                        # Check for gallery metadata or find additional images
-                        if 'gallery' in proj_data:
-                            proj_data['images'] = [f"project/{item.name}/{img}" for img in proj_data.get('gallery', [])]
-                        else:
-                            proj_data['images'] = []
-                            for img in item.glob("*.png"):
-                                if img.name != "featured.png":
-                                    proj_data['images'].append(f"project/{item.name}/{img.name}")
-
-                        self.projects.append(proj_data)
+    def load_publications(self, jobs: int = 1):
+        """Load all publications from content/publication/"""
+        self.publications = self.load_entries("publication", Publication, jobs)
+        # Only the featured image of a publication is published
+        for pub in self.publications:
+            pub.assets = [pub.featured_image] if pub.featured_image else []
 
-        # Sort by date (newest first)
-        self.projects.sort(key=lambda x: x.get('date', ''), reverse=True)
+    def load_projects(self, jobs: int = 1):
+        """Load all projects from content/project/"""
+        self.projects = self.load_entries("project", Project, jobs)
+        for proj in self.projects:
+            # Gallery from metadata, or every other png of the project
+            if 'gallery' in proj.meta:
+                proj.images = [f"project/{proj.slug}/{img}" for img in proj.meta['gallery']]
+            else:
+                proj.images = [rel for rel in proj.assets
+                               if rel.endswith('.png') and rel != proj.featured_image]
 
     def load_config(self):
         """Load site configuration from content/_index.md"""
         config_file = self.content_dir / "_index.md"
-        if config_file.exists():
-            self.config = self.read_markdown_file(config_file)
-
-    def generate_social_links(self, base_url: str = '') -> str:
-        """Generate social media links HTML"""
-        social_links = []
-        for social in self.author_data.get('social', []):
-            icon = social.get('icon', '')
-            icon_pack = social.get('icon_pack', 'fas')
-            link = social.get('link', '#')
-
-            # Adjust relative links for subdirectory
-            if link.startswith('/') or link.startswith('#'):
-                link = base_url + link.lstrip('/')
-
-            if icon_pack == 'ai':
-                # Academicons (google-scholar, cv, etc.)
-                if icon == 'cv' and not link.startswith('http'):
-                    link = base_url + link
-                label = icon.replace('-', ' ').title()
-                social_links.append(f'<a href="{link}" aria-label="{label}"><i class="ai ai-{icon}"></i></a>')
-            elif icon == 'envelope':
-                social_links.append(f'<a href="{link}" aria-label="Email"><i class="{icon_pack} fa-{icon}"></i></a>')
+        self.config = {}
+        if self.content.is_file(config_file):
+            self.config = self.read_document(config_file).meta
+
+    def get_config(self) -> dict:
+        """Site configuration, loaded on first use (only the index page needs it)"""
+        if self.config is None:
+            self.load_config()
+        return self.config
+
+    def load_manifest(self):
+        """Load the build manifest written by the previous run, if any"""
+        self.manifest = {'inputs': {}, 'outputs': {}}
+        manifest_file = self.output_dir / MANIFEST_NAME
+        if not manifest_file.exists():
+            return
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"Warning: ignoring unreadable build manifest {manifest_file}")
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.manifest = data
+
+    def save_manifest(self, plan: Dict[str, List[str]]):
+        """Record input hashes and per-page dependencies for the next run"""
+        inputs = {}
+        for deps in plan.values():
+            for dep in deps:
+                inputs[dep] = self.input_hash(dep)
+        data = {
+            'version': MANIFEST_VERSION,
+            'inputs': dict(sorted(inputs.items())),
+            'outputs': {out: deps for out, deps in sorted(plan.items())},
+            'assets': dict(sorted(self.asset_map.items())),
+            'compressed': dict(sorted(self.compressed.items())),
+        }
+        with atomic_write(self.output_dir / MANIFEST_NAME) as f:
+            f.write(json.dumps(data, indent=1).encode('utf-8'))
+
+    def input_hash(self, path: str) -> str | None:
+        """Hash of a build input, computed at most once per run.
+
+        Inputs are files and directories, plus derived nodes starting with
+        '@' (see derived_inputs) whose hashes are set when planning.
+        """
+        if path not in self.input_hashes:
+            listing = self.content.listing(path) if self.content else None
+            if listing is not None:
+                self.input_hashes[path] = hash_listing(listing)
             else:
-                label = icon.replace('-', ' ').title()
-                social_links.append(f'<a href="{link}" aria-label="{label}"><i class="{icon_pack} fa-{icon}"></i></a>')
-
-        return '\n'.join(social_links)
-
-    def generate_skills_html(self) -> str:
-        """Generate skills section HTML"""
-        skills_html = ''
-
-        for skill_group in self.author_data.get('skills', []):
-            # Use first group as technical, second as hobbies
-            name = skill_group.get('name', '')
-            # Determine color class based on position (first = technical, others = hobbies)
-            color_class = 'technical' if skill_group == self.author_data.get('skills', [])[0] else 'hobbies'
-            skills_html += f'<div class="skill-column"><h4 class="skill-group-title">{name.upper()}</h4>'
-
-            for item in skill_group.get('items', []):
-                icon_map = {
-                    'Machine Learning/Deep Learning': 'fa-python',
-                    '机器学习/深度学习': 'fa-python',
-                    'Data Science': 'fa-chart-line',
-                    '数据科学': 'fa-chart-line',
-                    'System/Architecture': 'fa-database',
-                    '系统/架构': 'fa-database',
-                    'Phsyics': 'fa-atom',
-                    '物理': 'fa-atom',
-                    'Hiking': 'fa-person-hiking',
-                    '徒步': 'fa-person-hiking',
-                    'Reading': 'fa-book',
-                    '阅读': 'fa-book',
-                    'Writing': 'fa-pen',
-                    '写作': 'fa-pen',
-                    'Cloudherd': 'fa-cloud',
-                    '云牧': 'fa-cloud'
-                }
-
-                icon = icon_map.get(item.get('name', ''), 'fa-circle')
-                icon_pack = item.get('icon_pack', 'fas')
-
-                skills_html += f'''
-                <div class="skill-item">
-                    <div class="skill-header">
-                        <i class="{icon_pack} {icon}"></i>
-                        <span class="skill-name">{item.get('name', '').upper()}</span>
-                    </div>
-                    <div class="skill-bar skill-bar-{color_class}">
-                        <div class="skill-progress" style="width: {item.get('percent', 0)}%"></div>
-                    </div>
-                </div>
-                '''
-            skills_html += '</div>'
-
-        return skills_html
-
-    def generate_interests_html(self) -> str:
-        """Generate interests list HTML"""
-        interests_html = ''
-        for interest in self.author_data.get('interests', []):
-            interests_html += f'<li><i class="fas fa-bookmark"></i> {interest}</li>'
-        return interests_html
-
-    def generate_education_html(self) -> str:
-        """Generate education section HTML"""
-        education_html = ''
-        for course in self.author_data.get('education', {}).get('courses', []):
-            education_html += f'''
-            <div class="education-item">
-                <i class="fas fa-graduation-cap"></i>
-                <div class="education-content">
-                    <strong>{course.get('course', '')}, {course.get('year', '')}</strong>
-                    <p>{course.get('institution', '')}</p>
-                </div>
-            </div>
-            '''
-        return education_html
-
-    def venue_pill(self, pub: dict) -> str:
-        """Render the publication venue as a colored pill tag.
-
-        Green = accepted/published, yellow = submitted/under review.
-        Shows the short venue name only (e.g. "SOSP 2026"), never the full title.
-        Status comes from the explicit `publication_status` field, falling back
-        to inference from the venue text.
+                self.input_hashes[path] = hash_path(Path(path))
+        return self.input_hashes[path]
+
+    def derived_inputs(self):
+        """Hash the facts pages depend on that aren't a single file.
+
+        '@publication/top' and '@project/top' are the ordered slugs previewed
+        on the index page, so a date change only invalidates the index when
+        an item enters, leaves or moves within the preview. '@build/options'
+        covers the build flags and the build year that change every page, and
+        '@icons' the vendored icons pages embed.
+        """
+        previews = {
+            '@publication/top': self.publications[:self.INDEX_PUBLICATIONS],
+            '@project/top': self.projects[:self.INDEX_PROJECTS],
+        }
+        for node, items in previews.items():
+            slugs = json.dumps([item.slug for item in items])
+            self.input_hashes[node] = hashlib.sha256(slugs.encode('utf-8')).hexdigest()
+        options = json.dumps({'optimize': self.optimize, 'year': self.build_date.year})
+        self.input_hashes['@build/options'] = hashlib.sha256(options.encode('utf-8')).hexdigest()
+        icons = hashlib.sha256()
+        for path in sorted(self.icon_dir.glob('*/*.svg')):
+            icons.update(f"{path.relative_to(self.icon_dir).as_posix()}\0".encode('utf-8'))
+            icons.update(path.read_bytes())
+        self.input_hashes['@icons'] = icons.hexdigest()
+
+    def author_file(self, lang: str) -> Path:
+        """Author profile used for a language (see load_author_data)"""
+        author_dir = self.content_dir / "authors" / "admin"
+        if lang != self.DEFAULT_LANG:
+            lang_file = author_dir / f"_index.{lang}.md"
+            if self.content.is_file(lang_file):
+                return lang_file
+        return author_dir / "_index.md"
+
+    def item_inputs(self, section: str, slug: str) -> List[str]:
+        """Inputs of the card or list item of one content entry"""
+        item_dir = self.content_dir / section / slug
+        inputs = [str(item_dir / "index.md")]
+        if section == "project":
+            # Card image dimensions and variants
+            inputs.append(str(item_dir / "featured.png"))
+        return inputs
+
+    def section_inputs(self, section: str) -> List[str]:
+        """Inputs of a page that lists every entry of a content section"""
+        section_dir = self.content_dir / section
+        inputs = [str(section_dir)]
+        for slug in self.content.entries(section):
+            inputs.append(str(section_dir / slug))
+            inputs += self.item_inputs(section, slug)
+        return inputs
+
+    def page_inputs(self, lang: str, page: str, slug: str = None) -> List[str]:
+        """List the inputs (files and derived nodes) a rendered page depends on.
+
+        Requires loaded content: the index page only depends on the items it
+        previews and on which items those are.
+        """
+        inputs = [
+            os.path.relpath(__file__),
+            '@build/options',
+            '@icons',
+            str(self.template_dir / "base.html"),
+            str(self.template_dir / "macros.html"),
+            # Referenced by fingerprinted name
+            str(self.template_dir / "style.css"),
+            str(self.template_dir / "script.js"),
+            str(self.i18n_dir / f"{lang}.yml"),
+            str(self.author_file(lang)),
+        ]
+        if page == 'index.html':
+            inputs.append(str(self.template_dir / "index.html"))
+            inputs.append(str(self.content_dir / "_index.md"))
+            inputs.append(str(self.content_dir / "authors" / "admin" / "avatar.jpg"))
+            inputs.append('@publication/top')
+            for pub in self.publications[:self.INDEX_PUBLICATIONS]:
+                inputs += self.item_inputs("publication", pub.slug)
+            inputs.append('@project/top')
+            for proj in self.projects[:self.INDEX_PROJECTS]:
+                inputs += self.item_inputs("project", proj.slug)
+        elif page == 'publications.html':
+            inputs.append(str(self.template_dir / "publications.html"))
+            inputs += self.section_inputs("publication")
+        elif page == 'projects.html':
+            inputs.append(str(self.template_dir / "projects.html"))
+            inputs += self.section_inputs("project")
+        elif page == 'project_detail.html':
+            proj = next(p for p in self.projects if p.slug == slug)
+            proj_dir = self.content_dir / "project" / slug
+            inputs.append(str(self.template_dir / "project_detail.html"))
+            inputs.append(str(proj_dir))
+            inputs.append(str(proj_dir / "index.md"))
+            inputs += [str(self.content_dir / rel) for rel in proj.assets]
+        return inputs
+
+    def search_inputs(self, lang: str) -> List[str]:
+        """Inputs of a language's search index: the text of every entry"""
+        inputs = [os.path.relpath(__file__), str(self.author_file(lang))]
+        for section in ("publication", "project"):
+            section_dir = self.content_dir / section
+            inputs.append(str(section_dir))
+            inputs += [str(section_dir / slug / "index.md") for slug in self.content.entries(section)]
+        return inputs
+
+    def plan_pages(self) -> Dict[str, List[str]]:
+        """Build the dependency graph: every page path (relative to the
+        output dir) mapped to its inputs. Content must be loaded."""
+        self.derived_inputs()
+        plan = {}
+        for lang in self.SUPPORTED_LANGS:
+            prefix = '' if lang == self.DEFAULT_LANG else f'{lang}/'
+            for page in ['index.html', 'publications.html', 'projects.html']:
+                plan[prefix + page] = self.page_inputs(lang, page)
+            # JSON indexes of the listing pages share their inputs
+            plan[prefix + 'publications.json'] = plan[prefix + 'publications.html']
+            plan[prefix + 'projects.json'] = plan[prefix + 'projects.html']
+            for proj in self.projects:
+                plan[f'{prefix}projects/{proj.slug}.html'] = self.page_inputs(lang, 'project_detail.html', proj.slug)
+            search_inputs = self.search_inputs(lang)
+            for name in ['docs'] + [str(shard) for shard in range(SEARCH_SHARDS)]:
+                plan[f'{prefix}search/{name}.json'] = search_inputs
+        return plan
+
+    def print_dependency_graph(self):
+        """Print which pages each input invalidates, marking changed inputs"""
+        self.load_translations()
+        self.scan_content()
+        self.load_publications()
+        self.load_projects()
+        self.load_manifest()
+        self.input_hashes = {}
+        plan = self.plan_pages()
+
+        dependents = {}
+        for output, inputs in plan.items():
+            for node in inputs:
+                dependents.setdefault(node, []).append(output)
+
+        old_hashes = self.manifest['inputs']
+        for node in sorted(dependents):
+            changed = old_hashes.get(node) != self.input_hash(node)
+            print(f"{node}{'  (changed)' if changed else ''}")
+            for output in sorted(dependents[node]):
+                print(f"    -> {output}")
+        stale = sorted(out for out, inputs in plan.items() if self.is_stale(out, inputs))
+        print(f"\n{len(plan)} pages, {len(dependents)} inputs, {len(stale)} pages stale")
+
+    def is_stale(self, output: str, inputs: List[str]) -> bool:
+        """Check whether a page must be re-rendered since the last build"""
+        if not (self.output_dir / output).exists():
+            return True
+        if self.manifest['outputs'].get(output) != inputs:
+            return True
+        old_hashes = self.manifest['inputs']
+        return any(old_hashes.get(dep) != self.input_hash(dep) for dep in inputs)
+
+    def needs_build(self, output_path: Path) -> bool:
+        """Check whether an output page is scheduled for this build"""
+        if self.stale_outputs is None:
+            return True
+        return self.output_key(output_path) in self.stale_outputs
+
+    def build_target_error(self, target: str) -> str | None:
+        """Why a build target (see select_outputs) is invalid, or None if it
+        is valid. Checks the content tree, so it works before loading."""
+        if target in ('index', 'publications', 'projects', 'search'):
+            return None
+        if target.startswith('project/'):
+            slug = target[len('project/'):]
+            if slug and '/' not in slug and (self.content_dir / "project" / slug / "index.md").is_file():
+                return None
+            return f"no project with slug '{slug}'"
+        return "expected index, publications, projects, search or project/<slug>"
+
+    def select_outputs(self, plan: Dict[str, List[str]], langs: List[str] = None,
+                       only: List[str] = None) -> set:
+        """Pages of the plan in the given languages that match a build target.
+
+        Targets are 'index', 'publications' and 'projects' (each listing page
+        with its JSON index), 'project/<slug>' for one project page and
+        'search' for the search index. None selects everything.
+        """
+        patterns = []
+        for target in only or []:
+            if target in ('index', 'publications', 'projects'):
+                patterns += [f'{target}.html', f'{target}.json']
+            elif target == 'search':
+                patterns.append('search/')
+            elif target.startswith('project/'):
+                slug = target[len('project/'):]
+                if not any(proj.slug == slug for proj in self.projects):
+                    raise ValueError(f"No project with slug '{slug}'")
+                patterns.append(f'projects/{slug}.html')
+            else:
+                raise ValueError(f"Unknown build target '{target}' (expected index, publications, "
+                                 f"projects, search or project/<slug>)")
+
+        selected = set()
+        for output in plan:
+            lang = self.output_lang(output)
+            if langs and lang not in langs:
+                continue
+            page = (self.output_dir / output).relative_to(self.lang_output_dir(lang)).as_posix()
+            if only is None or any(page == p or (p.endswith('/') and page.startswith(p)) for p in patterns):
+                selected.add(output)
+        return selected
+
+    def output_lang(self, output: str) -> str:
+        """Language of an output page, from its manifest key"""
+        first = output.split('/', 1)[0]
+        if first != self.DEFAULT_LANG and first in self.SUPPORTED_LANGS:
+            return first
+        return self.DEFAULT_LANG
+
+    def output_key(self, output_path: Path) -> str:
+        """Manifest key of an output file (path relative to the output dir)"""
+        return output_path.relative_to(self.output_dir).as_posix()
+
+    def remove_orphaned_pages(self, plan: Dict[str, List[str]]):
+        """Delete pages from the previous build that are no longer generated"""
+        for output in self.manifest['outputs']:
+            if output not in plan:
+                orphan = self.output_dir / output
+                if orphan.exists():
+                    orphan.unlink()
+                    print(f"  Removed stale page {output}")
+
+    def venue_status(self, pub: dict) -> tuple:
+        """Short venue label and review state of a publication.
+
+        State is 'accepted' (green pill) or 'submitted' (yellow pill). The
+        label is the short venue name only (e.g. "SOSP 2026"), never the full
+        title. Status comes from the explicit `publication_status` field,
+        falling back to inference from the venue text.
         """
         short = (pub.get('publication_short') or pub.get('publication') or '').strip()
         # Strip any trailing status annotation, e.g. "OSDI 2026 (Under Review)".
         label = re.sub(r'\s*\((?:under\s*review|submitted|submitting|in\s*review)\)\s*$',
                        '', short, flags=re.IGNORECASE).strip()
         if not label:
-            return ''
+            return '', ''
 
         status = (pub.get('publication_status') or '').strip().lower()
         if status in ('accepted', 'published', 'camera-ready', 'camera_ready'):
@@ -291,149 +1617,32 @@ class PersonalHomepageGenerator:
                 state = 'submitted'
             else:
                 state = 'accepted'
+        return label, state
 
-        if state == 'submitted':
-            label = f'{label} · Under Review'
-
-        return (f'<span class="venue-pill venue-pill--{state}">'
-                f'<span class="venue-dot"></span>{label}</span>')
-
-    def format_publication_item(self, pub: dict) -> str:
-        """Format a single publication item"""
-        authors = ', '.join(pub.get('authors', []))
-
-        links = []
-        if pub.get('url_pdf'):
-            links.append(f'<a href="{pub["url_pdf"]}" class="pub-link"><i class="fas fa-file-pdf"></i> PDF</a>')
-        if pub.get('doi'):
-            links.append(f'<a href="{pub["doi"]}" class="pub-link"><i class="fas fa-link"></i> DOI</a>')
-        for link in pub.get('links', []):
-            links.append(f'<a href="{link.get("url", "#")}" class="pub-link"><i class="fas fa-external-link-alt"></i> {link.get("name", "Link")}</a>')
-
-        links_html = ' '.join(links)
-
-        # Format date
+    def publication_year(self, pub: dict):
+        """Year of a publication's date, or '' when it has none"""
         date_str = pub.get('date', '')
-        year = ''
         if date_str:
             try:
-                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                year = date_obj.year
-            except:
-                year = ''
-
-        return f'''
-        <div class="publication-item" data-year="{year}">
-            <div class="pub-content">
-                <h4 class="pub-title">{pub.get('title', '')}</h4>
-                <p class="pub-authors">{authors}</p>
-                <p class="pub-venue">{self.venue_pill(pub)}</p>
-                <div class="pub-links">{links_html}</div>
-            </div>
-            {f'<div class="pub-year">{year}</div>' if year else ''}
-        </div>
-        '''
-
-    def format_project_card(self, proj: dict, base_url: str = '', t: dict = None) -> str:
-        """Format a project card"""
-        image = proj.get('featured_image', 'placeholder.png')
-        tags = proj.get('tags', [])
-        tags_str = ', '.join(tags)
-
-        # Generate individual tag spans with styling
-        tags_html = ' '.join([f'<span class="project-tag">{tag}</span>' for tag in tags])
-
-        # Build link buttons
-        links_html = '<div class="project-links">'
-
-        # Get translated text
-        view_project_text = 'View Project'
-        view_details_text = 'View Details →'
-        if t:
-            view_project_text = t.get('project_detail', {}).get('view_project', view_project_text)
-            view_details_text = t.get('project_detail', {}).get('view_details', view_details_text)
-
-        # Check for GitHub link
-        github_link = proj.get('github_link', '')
-        if github_link:
-            links_html += f'<a href="{github_link}" class="project-link github-link" target="_blank"><i class="fab fa-github"></i> GitHub</a>'
-
-        # Check for external link
-        external_link = proj.get('external_link', '')
-        if external_link:
-            links_html += f'<a href="{external_link}" class="project-link external-link" target="_blank"><i class="fas fa-external-link-alt"></i> {view_project_text}</a>'
-        elif not github_link:
-            # If no external or github link, show detail page link
-            link = f"{base_url}projects/{proj['slug']}.html"
-            links_html += f'<a href="{link}" class="project-link">{view_details_text}</a>'
-
-        links_html += '</div>'
-
-        # Convert summary markdown to HTML
-        summary = proj.get('summary', '')
-        self.md.reset()
-        summary_html = self.md.convert(summary).replace('<p>', '').replace('</p>', '')
-
-        return f'''
-        <div class="project-card" data-tags="{tags_str}">
-            <img src="{base_url}{image}" alt="{proj.get('title', '')}" class="project-image">
-            <div class="project-content">
-                <h3>{proj.get('title', '')}</h3>
-                <p>{summary_html}</p>
-                <div class="project-tags">{tags_html}</div>
-                {links_html}
-            </div>
-        </div>
-        '''
-
-    def generate_schedule_html(self, t: dict = None, variant: str = 'hero') -> str:
-        """Generate schedule/booking HTML.
-
-        variant:
-          - hero: compact button-style for top of page
-          - contact: inline text for contact section
-        """
-        schedule_text = 'If you wanna discuss with me, use this tool:'
-        schedule_link_text = 'Schedule a meeting'
-        if t:
-            schedule_text = t.get('contact', {}).get('schedule_text', schedule_text)
-            schedule_link_text = t.get('contact', {}).get('schedule_link', schedule_link_text)
-
-        url = "https://cal.com/yeqi-huang/discussion?duration=30"
-
-        if variant == 'contact':
-            return (
-                f'''<p class="schedule-link"><i class="fas fa-calendar-alt"></i> {schedule_text} '''
-                f'''<a href="{url}" target="_blank">{schedule_link_text}</a></p>'''
-            )
-
-        # hero
-        return (
-            f'''<a class="schedule-btn" href="{url}" target="_blank">'''
-            f'''<i class="fas fa-calendar-alt"></i> {schedule_link_text}</a>'''
-        )
-
-    def generate_contact_html(self, t: dict = None) -> str:
-        """Generate contact section HTML (email/address only; scheduling is shown earlier)."""
-        # Extract contact info from config
-        contact_info = {}
-        for section in self.config.get('sections', []):
-            if section.get('block') == 'contact':
-                contact_info = section.get('content', {})
-                break
-
-        html = f'<p><i class="fas fa-envelope"></i> {contact_info.get("email", "")}</p>'
+                return datetime.fromisoformat(date_str.replace('Z', '+00:00')).year
+            except ValueError:
+                pass
+        return ''
 
-        address = contact_info.get('address', {})
-        if address:
-            html += f'''<p><i class="fas fa-map-marker-alt"></i> {address.get('street', '')},
-                       {address.get('city', '')},
-                       {address.get('country', '')}</p>'''
+    def image_info(self, image: str):
+        """Size and responsive variants of an output image (see process_images)"""
+        return self.images.get(image)
 
-        if contact_info.get('directions'):
-            html += f'<p><i class="fas fa-door-open"></i> {contact_info.get("directions", "")}</p>'
+    def markdown_inline(self, text: str) -> Markup:
+        """Render a markdown snippet without its paragraph tags"""
+        return Markup(self.render_markdown(text).replace('<p>', '').replace('</p>', ''))
 
-        return html
+    def contact_info(self) -> dict:
+        """Contact block of the site config"""
+        for section in self.get_config().get('sections', []):
+            if section.get('block') == 'contact':
+                return section.get('content', {})
+        return {}
 
     def get_lang_switch_url(self, lang: str, page: str = 'index.html') -> str:
         """Get the URL to switch to the other language"""
@@ -442,14 +1651,105 @@ class PersonalHomepageGenerator:
         else:
             return f"../{page}"
 
+    def fragment(self, macro: str, record: Document, **params: str) -> Markup:
+        """Render a macro of macros.html for a record, once per build.
+
+        The macro is rendered with a placeholder for each of params (base URL,
+        translated labels) and cached under the record's source and content
+        hash; every call only substitutes the actual values. A card shown on
+        the index page, its listing page and the JSON index of every language
+        is therefore rendered a single time.
+        """
+        key = (macro, str(record.source), self.input_hash(str(record.source)), tuple(sorted(params)))
+        if key not in self.fragments:
+            placeholders = {name: Markup(f'\0{name}\0') for name in params}
+            macros = self.env.get_template('macros.html').module
+            html = str(getattr(macros, macro)(record, **placeholders))
+            self.fragments[key] = html, self.icons_in([html])
+        html, icons = self.fragments[key]
+        self.page_icons().update(icons)
+        for name, value in params.items():
+            html = html.replace(f'\0{name}\0', escape(value))
+        return Markup(html)
+
+    def find_icon(self, pack: str, name: str) -> str | None:
+        """Id ('<pack>-<name>') of a vendored icon, loading its SVG on first
+        use: templates/icons/<pack>/<name>.svg, or the same name in another
+        pack (Font Awesome brands are often asked for as 'fas'). None, with
+        a warning, if no pack has it."""
+        key = (pack, name)
+        if key not in self.icon_ids:
+            self.icon_ids[key] = None
+            for candidate in [pack] + [p for p in ICON_PACKS if p != pack]:
+                path = self.icon_dir / candidate / f"{name}.svg"
+                if path.is_file():
+                    match = _SVG_ICON.search(path.read_text(encoding='utf-8'))
+                    icon_id = f"{candidate}-{name}"
+                    self.icons[icon_id] = match.group(1), _SVG_COMMENT.sub('', match.group(2)).strip()
+                    self.icon_ids[key] = icon_id
+                    break
+            else:
+                print(f"Warning: icon '{pack} {name}' not found in {self.icon_dir}/")
+        return self.icon_ids[key]
+
+    def page_icons(self) -> set:
+        """Ids of the icons used by the file this thread is writing"""
+        if not hasattr(self._icon_local, 'used'):
+            self._icon_local.used = set()
+        return self._icon_local.used
+
+    def icon(self, pack: str, name: str, css_class: str = '') -> Markup:
+        """Inline SVG showing a vendored icon, e.g. icon('fas', 'moon').
+
+        The SVG only references the icon's <symbol>, which icon_sprite adds
+        to the end of the page. Unknown icons render as nothing.
+        """
+        icon_id = self.find_icon(pack, name)
+        if icon_id is None:
+            return Markup('')
+        self.page_icons().add(icon_id)
+        _, _, width, height = self.icons[icon_id][0].split()
+        classes = f"icon {css_class}".strip()
+        return Markup(f'<svg class="{classes}" width="{float(width) / float(height):.3g}em" height="1em" '
+                      f'aria-hidden="true"><use href="#{icon_id}"></use></svg>')
+
+    def icons_in(self, fragments: Iterable[str]) -> List[str]:
+        """Ids of the icons referenced by rendered HTML"""
+        return sorted({icon_id for html in fragments for icon_id in _ICON_USE.findall(str(html))})
+
+    def icon_sprite(self, extra: Iterable[str] = ()) -> Markup:
+        """Hidden <svg> with a <symbol> for every icon used so far in the
+        file being written, plus the ids in extra (icons of items the page
+        loads later from its JSON index)"""
+        ids = sorted(self.page_icons().union(extra))
+        if not ids:
+            return Markup('')
+        symbols = ''.join(f'<symbol id="{icon_id}" viewBox="{self.icons[icon_id][0]}">{self.icons[icon_id][1]}</symbol>'
+                          for icon_id in ids)
+        return Markup(f'<svg xmlns="http://www.w3.org/2000/svg" hidden>{symbols}</svg>')
+
+    def publication_item(self, pub: Publication) -> Markup:
+        """Publication list entry (the same in every language)"""
+        return self.fragment('publication_item', pub)
+
+    def project_card(self, proj: Project, base_url: str, t: dict) -> Markup:
+        """Project card; only the links and button labels depend on the language"""
+        texts = t.get('project_detail') or {}
+        return self.fragment('project_card', proj, base_url=base_url,
+                             view_project=texts.get('view_project') or 'View Project',
+                             view_details=texts.get('view_details') or 'View Details →')
+
     def get_base_context(self, lang: str, base_url: str = '', page: str = 'index.html') -> dict:
         """Get common context for all pages"""
         t = self.get_translations(lang)
         return {
             'site_title': t.get('site', {}).get('title', 'Personal Homepage'),
-            'author_name': self.author_data.get('name_pronunciation', 'Your Name'),
-            'year': datetime.now().year,
+            'author_name': self.get_author_data(lang).get('name_pronunciation', 'Your Name'),
+            'year': self.build_date.year,
             'base_url': base_url,
+            # Root of the language's own tree (its search index lives there)
+            'lang_url': base_url if lang == self.DEFAULT_LANG else f'{base_url}{lang}/',
+            'asset_url': lambda path: base_url + self.asset_path(path),
             't': t,
             'lang': lang,
             'lang_switch_url': self.get_lang_switch_url(lang, page),
@@ -459,355 +1759,1196 @@ class PersonalHomepageGenerator:
         """Generate the main index page"""
         if output_dir is None:
             output_dir = self.output_dir
+        if not self.needs_build(output_dir / "index.html"):
+            return
 
         template = self.env.get_template('index.html')
         t = self.get_translations(lang)
         base_url = '' if lang == self.DEFAULT_LANG else '../'
 
+        author = self.get_author_data(lang)
+
         # Remove {style="text-align: justify;"} from bio
-        bio_html = self.author_data.get('content_html', '').replace('{style="text-align: justify;"}', '')
+        bio_html = author.content_html.replace('{style="text-align: justify;"}', '')
 
         context = self.get_base_context(lang, base_url, 'index.html')
         context.update({
-            'title': self.author_data.get('name_pronunciation', t.get('site', {}).get('title', 'Personal Homepage')),
+            'title': author.get('name_pronunciation', t.get('site', {}).get('title', 'Personal Homepage')),
 
             # Hero section
-            'name_pronunciation': self.author_data.get('title', ''),
-            'role': self.author_data.get('role', ''),
-            'org_name': self.author_data.get('organizations', [{}])[0].get('name', ''),
-            'org_url': self.author_data.get('organizations', [{}])[0].get('url', '#'),
-            'social_links': self.generate_social_links(base_url),
-            'schedule_html': self.generate_schedule_html(t, variant='hero'),
-            'bio_content': bio_html,
-
-            # About section
-            'skills_content': self.generate_skills_html(),
-            'interests_content': self.generate_interests_html(),
-            'education_content': self.generate_education_html(),
+            'author': author,
+            'name_pronunciation': author.get('title', ''),
+            'role': author.get('role', ''),
+            'org_name': author.get('organizations', [{}])[0].get('name', ''),
+            'org_url': author.get('organizations', [{}])[0].get('url', '#'),
+            'bio_content': Markup(bio_html),
 
-            # Publications preview (latest 10)
-            'publications_preview': ''.join([self.format_publication_item(pub) for pub in self.publications[:10]]),
-
-            # Projects preview (latest 6)
-            'projects_preview': ''.join([self.format_project_card(proj, base_url, t) for proj in self.projects[:6]]),
+            # Publications and projects previews (latest INDEX_PUBLICATIONS/INDEX_PROJECTS)
+            'publications': self.publications[:self.INDEX_PUBLICATIONS],
+            'projects': self.projects[:self.INDEX_PROJECTS],
 
             # Contact
-            'contact_content': self.generate_contact_html(t)
+            'contact_info': self.contact_info(),
         })
 
-        html = template.render(context)
-
-        with open(output_dir / "index.html", 'w', encoding='utf-8') as f:
-            f.write(html)
+        self.write_output(output_dir / "index.html", template.generate(context))
 
     def generate_publications_page(self, lang: str = 'en', output_dir: Path = None):
         """Generate the publications listing page"""
         if output_dir is None:
             output_dir = self.output_dir
+        if not self.needs_build(output_dir / "publications.html"):
+            return
 
         template = self.env.get_template('publications.html')
         t = self.get_translations(lang)
         base_url = '' if lang == self.DEFAULT_LANG else '../'
 
-        # Generate year filters
-        years = set()
-        for pub in self.publications:
-            date_str = pub.get('date', '')
-            if date_str:
-                try:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    years.add(date_obj.year)
-                except:
-                    pass
-
-        year_filters = ''
-        for year in sorted(years, reverse=True):
-            year_filters += f'<span class="filter-tag" data-year="{year}">{year}</span>'
+        # Year filters
+        years = {self.publication_year(pub) for pub in self.publications} - {''}
 
         context = self.get_base_context(lang, base_url, 'publications.html')
         context.update({
             'title': t.get('publications', {}).get('title', 'Publications'),
-            'publications_content': ''.join([self.format_publication_item(pub) for pub in self.publications]),
-            'year_filters': year_filters
+            'publications': self.publications[:self.PUBLICATIONS_PAGE_SIZE],
+            'total': len(self.publications),
+            'page_size': self.PUBLICATIONS_PAGE_SIZE,
+            'years': sorted(years, reverse=True),
+            # Icons of the items only publications.json shows
+            'item_icons': self.icons_in(self.publication_item(pub)
+                                        for pub in self.publications[self.PUBLICATIONS_PAGE_SIZE:]),
         })
 
-        html = template.render(context)
-
-        with open(output_dir / "publications.html", 'w', encoding='utf-8') as f:
-            f.write(html)
+        self.write_output(output_dir / "publications.html", template.generate(context))
 
     def generate_projects_page(self, lang: str = 'en', output_dir: Path = None):
         """Generate the projects listing page"""
         if output_dir is None:
             output_dir = self.output_dir
+        if not self.needs_build(output_dir / "projects.html"):
+            return
 
         template = self.env.get_template('projects.html')
         t = self.get_translations(lang)
         base_url = '' if lang == self.DEFAULT_LANG else '../'
 
-        # Generate tag filters
-        tags = set()
-        for proj in self.projects:
-            for tag in proj.get('tags', []):
-                tags.add(tag)
-
-        tag_filters = ''
-        for tag in sorted(tags):
-            tag_filters += f'<span class="filter-tag" data-tag="{tag}">{tag}</span>'
+        # Tag filters
+        tags = {tag for proj in self.projects for tag in proj.get('tags', [])}
 
         context = self.get_base_context(lang, base_url, 'projects.html')
         context.update({
             'title': t.get('projects', {}).get('title', 'Projects'),
-            'projects_content': ''.join([self.format_project_card(proj, base_url, t) for proj in self.projects]),
-            'tag_filters': tag_filters
+            'projects': self.projects[:self.PROJECTS_PAGE_SIZE],
+            'total': len(self.projects),
+            'page_size': self.PROJECTS_PAGE_SIZE,
+            'tags': sorted(tags),
+            'item_icons': self.icons_in(self.project_card(proj, base_url, t)
+                                        for proj in self.projects[self.PROJECTS_PAGE_SIZE:]),
         })
 
-        html = template.render(context)
+        self.write_output(output_dir / "projects.html", template.generate(context))
 
-        with open(output_dir / "projects.html", 'w', encoding='utf-8') as f:
-            f.write(html)
+    def write_listing_index(self, path: Path, items: Iterable[tuple[str, str]], postings: Dict[str, dict]):
+        """Write the JSON index of a listing page, one item at a time.
 
-    def generate_project_detail_pages(self, lang: str = 'en', output_dir: Path = None):
-        """Generate individual project detail pages"""
+        items yields (HTML, search text) pairs in page order; postings map a
+        filter name (e.g. 'years') to the item numbers of each of its values,
+        and are only read once items is exhausted, so they may be filled in
+        while it is consumed.
+        """
+        def dumps(value):
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+        def chunks():
+            yield '{"items":['
+            for number, (html, text) in enumerate(items):
+                html = minify_html(html) if self.optimize else html.strip()
+                yield (',' if number else '') + dumps({'html': html, 'text': text.lower()})
+            yield ']'
+            for name, values in postings.items():
+                yield f',{dumps(name)}:{dumps(values)}'
+            yield '}'
+
+        self.write_output(path, chunks())
+
+    def generate_publications_index(self, lang: str = 'en', output_dir: Path = None):
+        """Generate publications.json: every publication item with per-year
+        posting lists, loaded on demand by the publications page"""
         if output_dir is None:
             output_dir = self.output_dir
+        if not self.needs_build(output_dir / "publications.json"):
+            return
+
+        years = {}
+
+        def items():
+            for number, pub in enumerate(self.publications):
+                year = self.publication_year(pub)
+                if year:
+                    years.setdefault(str(year), []).append(number)
+                text = ' '.join([pub.get('title', ''), ', '.join(pub.get('authors', [])),
+                                 self.venue_status(pub)[0], str(year)])
+                yield str(self.publication_item(pub)), text
+
+        self.write_listing_index(output_dir / "publications.json", items(), {'years': years})
+
+    def generate_projects_index(self, lang: str = 'en', output_dir: Path = None):
+        """Generate projects.json: every project card with per-tag posting
+        lists, loaded on demand by the projects page"""
+        if output_dir is None:
+            output_dir = self.output_dir
+        if not self.needs_build(output_dir / "projects.json"):
+            return
 
-        template = self.env.get_template('project_detail.html')
         t = self.get_translations(lang)
         base_url = '' if lang == self.DEFAULT_LANG else '../'
-        # For detail pages, we need one more level up
-        detail_base_url = '../' if lang == self.DEFAULT_LANG else '../../'
+        tags = {}
+
+        def items():
+            for number, proj in enumerate(self.projects):
+                for tag in proj.get('tags', []):
+                    tags.setdefault(tag, []).append(number)
+                text = ' '.join([proj.get('title', ''), proj.get('summary', ''), ' '.join(proj.get('tags', []))])
+                yield str(self.project_card(proj, base_url, t)), text
+
+        self.write_listing_index(output_dir / "projects.json", items(), {'tags': tags})
+
+    def search_entries(self, lang: str) -> List[tuple[dict, list]]:
+        """Documents of a language's search index.
+
+        Each is a result record (title, url relative to the language root,
+        info line) with its (weight, text) fields; a term scores the summed
+        weights of its occurrences.
+        """
+        author = self.get_author_data(lang)
+        name = str(author.get('title') or '')
+        entries = [({'title': name, 'url': 'index.html', 'info': author.get('role') or ''}, [
+            (5, name),
+            (5, author.get('name_pronunciation') or ''),
+            (2, author.get('bio') or ''),
+            (2, ' '.join(author.get('interests') or [])),
+            (1, author.body),
+        ])]
+        for pub in self.publications:
+            title = str(pub.get('title') or '')
+            url = pub.get('url_pdf') or pub.get('doi') or 'publications.html'
+            entries.append(({'title': title, 'url': url, 'info': self.venue_status(pub)[0]}, [
+                (5, title),
+                (3, ', '.join(pub.get('authors') or [])),
+                (3, ' '.join(pub.get('tags') or [])),
+                (2, pub.get('summary') or ''),
+                (2, pub.get('abstract') or ''),
+                (1, pub.body),
+            ]))
+        for proj in self.projects:
+            title = str(proj.get('title') or '')
+            summary = proj.get('summary') or ''
+            entries.append(({'title': title, 'url': f'projects/{proj.slug}.html', 'info': summary}, [
+                (5, title),
+                (3, ' '.join(proj.get('tags') or [])),
+                (2, summary),
+                (1, proj.body),
+            ]))
+        return entries
+
+    def search_terms(self, fields: list) -> Dict[str, int]:
+        """Term weights of one document, cached by its text so only new or
+        edited entries are tokenized again"""
+        key = self.markdown_cache.key('search', json.dumps(fields, ensure_ascii=False))
+        weights = self.markdown_cache.get(key)
+        if weights is None:
+            weights = {}
+            for weight, text in fields:
+                for term in search_tokens(_MARKDOWN_NOISE.sub(' ', str(text))):
+                    weights[term] = weights.get(term, 0) + weight
+            self.markdown_cache.put(key, weights)
+        return weights
+
+    def search_index(self, lang: str) -> tuple[list, dict]:
+        """Result records and term postings (document number, weight) of a
+        language's search index, built once per run"""
+        if lang not in self.search_indexes:
+            docs, postings = [], {}
+            for record, fields in self.search_entries(lang):
+                for term, weight in self.search_terms(fields).items():
+                    postings.setdefault(term, []).append((len(docs), weight))
+                docs.append(record)
+            self.search_indexes[lang] = docs, postings
+        return self.search_indexes[lang]
+
+    def generate_search_docs(self, lang: str = 'en', output_dir: Path = None):
+        """Generate search/docs.json: the result records, fetched when the
+        search box is first used"""
+        if output_dir is None:
+            output_dir = self.output_dir
+        if not self.needs_build(output_dir / "search" / "docs.json"):
+            return
+
+        docs, _ = self.search_index(lang)
+        data = {'shards': SEARCH_SHARDS, 'docs': docs}
+        self.write_output(output_dir / "search" / "docs.json",
+                          json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+    def generate_search_shard(self, shard: int, lang: str = 'en', output_dir: Path = None):
+        """Generate search/<shard>.json: the postings of the terms in one shard.
+
+        Each term maps to a flat [document gap, weight, ...] list, document
+        numbers being delta-encoded.
+        """
+        if output_dir is None:
+            output_dir = self.output_dir
+        path = output_dir / "search" / f"{shard}.json"
+        if not self.needs_build(path):
+            return
+
+        _, postings = self.search_index(lang)
+        terms = {}
+        for term in sorted(postings):
+            if search_shard(term) != shard:
+                continue
+            flat, previous = [], 0
+            for number, weight in postings[term]:
+                flat += [number - previous, weight]
+                previous = number
+            terms[term] = flat
+        self.write_output(path, json.dumps(terms, ensure_ascii=False, separators=(',', ':')))
+
+    def generate_project_detail_page(self, proj: dict, lang: str = 'en', output_dir: Path = None):
+        """Generate the detail page of a single project"""
+        if output_dir is None:
+            output_dir = self.output_dir
 
         # Create projects directory
         projects_dir = output_dir / "projects"
         projects_dir.mkdir(exist_ok=True)
+        if not self.needs_build(projects_dir / f"{proj.slug}.html"):
+            return
 
-        for proj in self.projects:
-            # Format tags
-            tags_html = ''
-            for tag in proj.get('tags', []):
-                tags_html += f'<span>{tag}</span>'
-
-            # Format gallery images
-            images_html = ''
-            for img in proj.get('images', []):
-                images_html += f'<img src="{detail_base_url}{img}" alt="{proj.get("title", "")} screenshot">'
-
-            context = self.get_base_context(lang, detail_base_url, f'projects/{proj["slug"]}.html')
-            # Fix lang switch URL for detail pages
-            if lang == 'en':
-                context['lang_switch_url'] = f"../../zh/projects/{proj['slug']}.html"
+        template = self.env.get_template('project_detail.html')
+        # For detail pages, we need one more level up
+        detail_base_url = '../' if lang == self.DEFAULT_LANG else '../../'
+
+        context = self.get_base_context(lang, detail_base_url, f'projects/{proj.slug}.html')
+        # Fix lang switch URL for detail pages
+        if lang == 'en':
+            context['lang_switch_url'] = f"../../zh/projects/{proj.slug}.html"
+        else:
+            context['lang_switch_url'] = f"../../projects/{proj.slug}.html"
+
+        context.update({
+            'title': proj.get('title', 'Project'),
+            'project': proj,
+            'project_content': Markup(proj.content_html),
+        })
+
+        self.write_output(projects_dir / f"{proj.slug}.html", template.generate(context))
+
+    def lang_output_dir(self, lang: str) -> Path:
+        """Output directory of a language (non-default languages get a subdirectory)"""
+        if lang == self.DEFAULT_LANG:
+            return self.output_dir
+        return self.output_dir / lang
+
+    def write_output(self, path: Path, content: str | Iterable[str]):
+        """Write a generated text file atomically, counting the bytes for the
+        profiler.
+
+        content is a string or an iterable of chunks, such as a template's
+        generate(), which is streamed to disk without building the page.
+        """
+        chunks = [content] if isinstance(content, str) else content
+        self._icon_local.used = set()
+        if self.optimize and path.suffix == '.html':
+            # Critical CSS and minification need the whole page
+            chunks = [self.optimize_html(''.join(chunks))]
+        size = 0
+        with atomic_write(path) as f:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                f.write(data)
+                size += len(data)
+        self.profiler.add_bytes(size)
+
+    def optimize_cache_file(self, kind: str, source: str, transform: Callable[[str], str]) -> Path:
+        """Cache file holding transform(source), computed once per source hash"""
+        digest = hashlib.sha256(f"{kind}\0{source}".encode('utf-8')).hexdigest()[:32]
+        path = self.cache_dir / "optimize" / f"{digest}.{kind}"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(transform(source), encoding='utf-8')
+            os.replace(tmp_path, path)
+        return path
+
+    def fold_marker(self) -> Markup:
+        """Where a page's first screen ends, for optimize_html. Templates
+        write {{ fold() }}; without --optimize it renders nothing."""
+        return Markup(FOLD_MARKER if self.optimize else '')
+
+    def optimize_html(self, html: str) -> str:
+        """Inline a page's critical CSS, load style.css asynchronously and
+        minify the result.
+
+        The critical CSS is the part of style.css whose selectors match the
+        markup above the page's <!-- fold --> marker (the whole page if it
+        has none), so each page type gets what its first screen needs.
+        """
+        stylesheet = self.template_dir / "style.css"
+        name = re.escape(self.asset_path('style.css'))
+        link = re.search(rf'<link rel="stylesheet" href="((?:\.\./)*{name})">', html)
+        if link and stylesheet.exists():
+            css = self.optimize_cache_file('min.css', stylesheet.read_text(encoding='utf-8'),
+                                           minify_css).read_text(encoding='utf-8')
+            above_fold, marker, _ = html.partition(FOLD_MARKER)
+            tokens = html_tokens(above_fold if marker else html)
+            signature = json.dumps({key: sorted(value) for key, value in tokens.items()}, sort_keys=True)
+            critical = self.optimize_cache_file('critical.css', f"{css}\0{signature}",
+                                                lambda _: critical_css(css, tokens)).read_text(encoding='utf-8')
+            href = link.group(1)
+            html = html.replace(link.group(0), (
+                f'<style>{critical}</style>'
+                f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                f'<noscript><link rel="stylesheet" href="{href}"></noscript>'), 1)
+        return minify_html(html)
+
+    def build_page(self, output: str):
+        """Render one page, identified by its path relative to the output dir"""
+        lang = self.output_lang(output)
+        output_dir = self.lang_output_dir(lang)
+        page = (self.output_dir / output).relative_to(output_dir).as_posix()
+
+        if page == 'index.html':
+            method, args = self.generate_index_page, ()
+        elif page == 'publications.html':
+            method, args = self.generate_publications_page, ()
+        elif page == 'projects.html':
+            method, args = self.generate_projects_page, ()
+        elif page == 'publications.json':
+            method, args = self.generate_publications_index, ()
+        elif page == 'projects.json':
+            method, args = self.generate_projects_index, ()
+        elif page == 'search/docs.json':
+            method, args = self.generate_search_docs, ()
+        elif page.startswith('search/') and page.endswith('.json'):
+            method, args = self.generate_search_shard, (int(page[len('search/'):-len('.json')]),)
+        elif page.startswith('projects/') and page.endswith('.html'):
+            slug = page[len('projects/'):-len('.html')]
+            proj = next((p for p in self.projects if p.slug == slug), None)
+            if proj is None:
+                raise ValueError(f"No project with slug '{slug}'")
+            method, args = self.generate_project_detail_page, (proj,)
+        else:
+            raise ValueError(f"Don't know how to build page '{output}'")
+
+        with self.profiler.span(output, 'page', kind=method.__name__):
+            method(*args, lang, output_dir)
+
+    def make_pool(self, jobs: int):
+        """Worker pool for page rendering.
+
+        Forked processes give real parallelism for the CPU-bound markdown and
+        template work; threads are the fallback where fork is unavailable.
+        """
+        if 'fork' in multiprocessing.get_all_start_methods():
+            return ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork'))
+        return ThreadPoolExecutor(jobs)
+
+    def prepare_shared_content(self, outputs: List[str]):
+        """Build what several of the given pages need before they are split
+        between workers, which then inherit it instead of each building it
+        again: the search index of every language with a stale search file,
+        and the publication and project fragments if a listing is stale."""
+        shared = set()
+        for output in outputs:
+            lang = self.output_lang(output)
+            page = (self.output_dir / output).relative_to(self.lang_output_dir(lang)).as_posix()
+            if page.startswith('search/'):
+                shared.add(('search', lang))
+            elif page in ('publications.html', 'publications.json'):
+                shared.add(('publications', self.DEFAULT_LANG))
+            elif page in ('projects.html', 'projects.json'):
+                shared.add(('projects', self.DEFAULT_LANG))
+
+        for kind, lang in sorted(shared):
+            if kind == 'search':
+                self.search_index(lang)
+            elif kind == 'publications':
+                for pub in self.publications:
+                    self.publication_item(pub)
             else:
-                context['lang_switch_url'] = f"../../projects/{proj['slug']}.html"
-
-            context.update({
-                'title': proj.get('title', 'Project'),
-                'project_title': proj.get('title', ''),
-                'project_tags': tags_html,
-                'external_link': proj.get('external_link', ''),
-                'featured_image': f"{detail_base_url}{proj.get('featured_image', '')}" if proj.get('featured_image') else None,
-                'project_content': proj.get('content_html', ''),
-                'project_images': images_html if images_html else None
-            })
+                # Fragments are the same in every language (see fragment)
+                t = self.get_translations(lang)
+                for proj in self.projects:
+                    self.project_card(proj, '', t)
 
-            html = template.render(context)
+    def render_pages(self, outputs: List[str], jobs: int = 1):
+        """Render the given pages, on a worker pool when jobs > 1.
 
-            with open(projects_dir / f"{proj['slug']}.html", 'w', encoding='utf-8') as f:
-                f.write(html)
+        Every page is written by exactly one worker, so the output does not
+        depend on scheduling. All failures are reported (in page order)
+        before the build is aborted.
+        """
+        global _pool_generator
+        outputs = sorted(outputs)
+        failures = []
+
+        if jobs <= 1 or len(outputs) <= 1:
+            for output in outputs:
+                try:
+                    self.build_page(output)
+                except Exception as exc:
+                    failures.append((output, exc))
+        else:
+            # Created before forking so the workers share it
+            self.env
+            self.prepare_shared_content(outputs)
+            _pool_generator = self
+            try:
+                with self.make_pool(jobs) as pool:
+                    futures = [pool.submit(_render_page_task, output) for output in outputs]
+                    for output, future in zip(outputs, futures):
+                        try:
+                            self.profiler.absorb(future.result())
+                        except Exception as exc:
+                            failures.append((output, exc))
+            finally:
+                _pool_generator = None
+
+        if failures:
+            for output, exc in failures:
+                print(f"Error: failed to render {output}:")
+                print(''.join(traceback.format_exception(exc)).rstrip())
+            raise BuildError(f"{len(failures)} page(s) failed to render")
+
+    def static_files(self) -> List[tuple[Path, str]]:
+        """CSS and JS files from templates as (source, path in output tree)"""
+        return [(self.template_dir / name, name) for name in ["style.css", "script.js"]
+                if (self.template_dir / name).exists()]
 
     def copy_static_files(self, output_dir: Path = None):
-        """Copy CSS and JS files from templates to dist"""
+        """Copy CSS and JS files from templates to dist (minified with
+        --optimize), under their plain and fingerprinted names"""
         if output_dir is None:
             output_dir = self.output_dir
 
-        # Copy CSS
-        css_src = self.template_dir / "style.css"
-        if css_src.exists():
-            shutil.copy(css_src, output_dir / "style.css")
+        for src, name in self.static_files():
+            if self.optimize:
+                minify = minify_css if src.suffix == '.css' else minify_js
+                src = self.optimize_cache_file(f"min{src.suffix}", src.read_text(encoding='utf-8'), minify)
+            sync_file(src, output_dir / name, mtime_ns=self.output_mtime_ns)
+            if name in self.asset_map:
+                sync_file(src, output_dir / self.asset_map[name], mtime_ns=self.output_mtime_ns)
+
+    def fingerprint_assets(self):
+        """Give static files and images a content-hashed name (name.<hash>.ext).
+
+        Pages reference assets through asset_path/asset_url, so the hashed
+        files can be cached forever: a changed file gets a new name. The CV
+        keeps its stable URL. Assets are also published under their plain
+        names (as hardlinks), for links from outside and from markdown bodies.
+        """
+        self.asset_map = {}
+        for src, rel in self.static_files() + self.asset_files():
+            if rel.startswith('uploads/'):
+                continue
+            stem, ext = rel.rsplit('.', 1)
+            digest = self.input_hash(str(src))[:FINGERPRINT_LENGTH]
+            self.asset_map[rel] = f"{stem}.{digest}.{ext}"
+
+    def asset_path(self, path: str) -> str:
+        """Fingerprinted output path of an asset (unchanged if it has none)"""
+        return self.asset_map.get(path, path)
+
+    def remove_stale_fingerprints(self, output_dir: Path):
+        """Delete old fingerprinted copies of top-level assets (style.css,
+        avatar.jpg, ...). Those under project/ and publication/ are removed
+        with the other orphans by copy_assets."""
+        for rel, hashed in self.asset_map.items():
+            if '/' in rel:
+                continue
+            stem, ext = rel.rsplit('.', 1)
+            for path in output_dir.glob(f"{stem}.{'?' * FINGERPRINT_LENGTH}.{ext}"):
+                if path.name != hashed:
+                    path.unlink()
 
-        # Copy JS
-        js_src = self.template_dir / "script.js"
-        if js_src.exists():
-            shutil.copy(js_src, output_dir / "script.js")
+    def asset_files(self) -> List[tuple[Path, str]]:
+        """List images and other assets as (source, path in output tree)"""
+        assets = []
 
-    def copy_assets(self, output_dir: Path = None):
-        """Copy images and other assets to output directory"""
-        if output_dir is None:
-            output_dir = self.output_dir
-
-        # Copy author avatar
+        # Author avatar
         avatar_src = self.content_dir / "authors" / "admin" / "avatar.jpg"
-        if avatar_src.exists():
-            shutil.copy(avatar_src, output_dir / "avatar.jpg")
-
-        # Copy project images
-        proj_dir = self.content_dir / "project"
-        if proj_dir.exists():
-            output_proj_dir = output_dir / "project"
-            output_proj_dir.mkdir(parents=True, exist_ok=True)
-
-            for item in proj_dir.iterdir():
-                if item.is_dir():
-                    item_output = output_proj_dir / item.name
-                    item_output.mkdir(exist_ok=True)
-
-                    # Copy all images (png and jpg)
-                    for img in item.glob("*.png"):
-                        shutil.copy(img, item_output / img.name)
-                    for img in item.glob("*.jpg"):
-                        shutil.copy(img, item_output / img.name)
-                    for img in item.glob("*.jpeg"):
-                        shutil.copy(img, item_output / img.name)
-
-        # Copy publication images
-        pub_dir = self.content_dir / "publication"
-        if pub_dir.exists():
-            output_pub_dir = output_dir / "publication"
-            output_pub_dir.mkdir(parents=True, exist_ok=True)
-
-            for item in pub_dir.iterdir():
-                if item.is_dir():
-                    item_output = output_pub_dir / item.name
-                    item_output.mkdir(exist_ok=True)
-
-                    # Copy featured image
-                    featured = item / "featured.png"
-                    if featured.exists():
-                        shutil.copy(featured, item_output / "featured.png")
-
-        # Copy CV if exists
+        if self.content.is_file(avatar_src):
+            assets.append((avatar_src, "avatar.jpg"))
+
+        # All project images (png and jpg) and publication featured images,
+        # as listed when the content was loaded
+        for entry in self.projects + self.publications:
+            assets += [(self.content_dir / rel, rel) for rel in entry.assets]
+
+        # Fallback CV, unless collect_cv will provide a compiled one (it only
+        # runs when the CV step is enabled)
         cv_src = self.content_dir / "resume.pdf"
-        if cv_src.exists():
-            uploads_dir = output_dir / "uploads"
-            uploads_dir.mkdir(exist_ok=True)
-            shutil.copy(cv_src, uploads_dir / "resume.pdf")
+        if self.content.is_file(cv_src) and not (self.cv and (self.cv_dir / "main.pdf").exists()):
+            assets.append((cv_src, "uploads/resume.pdf"))
+
+        # Responsive variants from process_images
+        assets += self.image_variant_files
+
+        return assets
+
+    def image_size(self, path: Path) -> tuple[int, int] | None:
+        """Pixel size of an image (PNG only when Pillow is not installed)"""
+        Image = pillow()
+        if Image is not None:
+            with Image.open(path) as img:
+                return img.size
+        with open(path, 'rb') as f:
+            head = f.read(24)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', head[16:24])
+        return None
+
+    def image_formats(self) -> List[str]:
+        """Modern image formats the installed Pillow can encode, best first"""
+        if pillow() is None:
+            return []
+        from PIL import features
+        return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
 
-    def generate_for_language(self, lang: str):
-        """Generate all pages for a specific language"""
-        if lang == self.DEFAULT_LANG:
-            output_dir = self.output_dir
-        else:
-            output_dir = self.output_dir / lang
-            output_dir.mkdir(parents=True, exist_ok=True)
+    def process_images(self, jobs: int = 1):
+        """Create resized WebP/AVIF variants of the project images.
 
-        # Load language-specific author data
-        self.load_author_data(lang)
+        Variants are cached in .build-cache/images by source hash and width, so
+        only new or changed images are encoded. Encoding is slow and each
+        variant independent, so it uses a worker per CPU even when jobs is
+        lower (jobs only raises that). Fills self.images for the picture macro and
+        self.image_variant_files for copy_assets.
+        """
+        self.images = {}
+        self.image_variant_files = []
+        formats = self.image_formats()
+        cache_dir = self.cache_dir / "images"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        pending = []
+        for src, rel in self.asset_files():
+            if not rel.startswith('project/'):
+                continue
+            size = self.image_size(src)
+            if size is None:
+                continue
+            width, height = size
+            digest = self.input_hash(str(src))[:16]
+            widths = sorted({w for w in IMAGE_WIDTHS if w < width} | {min(width, IMAGE_WIDTHS[-1])})
+            stem = rel.rsplit('.', 1)[0]
+
+            info = {'width': width, 'height': height, 'sources': []}
+            for fmt in formats:
+                variants = []
+                for w in widths:
+                    cached = cache_dir / f"{digest}-{w}.{fmt}"
+                    if not cached.exists():
+                        pending.append((rel, str(src), str(cached), w, fmt))
+                    variants.append((f"{stem}-{w}w.{fmt}", w))
+                    self.image_variant_files.append((cached, f"{stem}-{w}w.{fmt}"))
+                info['sources'].append((f"image/{fmt}", variants))
+            self.images[rel] = info
+
+        if pending:
+            workers = min(max(jobs, os.cpu_count() or 1), len(pending))
+            print(f"  Encoding {len(pending)} image variants ({workers} worker{'s' if workers != 1 else ''})...")
+            failed = set()
+            if workers <= 1:
+                for rel, *args in pending:
+                    try:
+                        _encode_image_variant(*args)
+                    except Exception as exc:
+                        print(f"Warning: could not convert {rel}: {exc}")
+                        failed.add(rel)
+            else:
+                with self.make_pool(workers) as pool:
+                    futures = [pool.submit(_encode_image_variant, *args) for _, *args in pending]
+                    for (rel, *_), future in zip(pending, futures):
+                        try:
+                            future.result()
+                        except Exception as exc:
+                            print(f"Warning: could not convert {rel}: {exc}")
+                            failed.add(rel)
+            # Images that failed to convert are shipped without variants
+            for rel in failed:
+                self.images[rel]['sources'] = []
+            self.image_variant_files = [(cached, out) for cached, out in self.image_variant_files
+                                        if cached.exists()]
+
+        # Drop cached variants of images that no longer exist
+        referenced = {cached.name for cached, _ in self.image_variant_files}
+        for entry in os.scandir(cache_dir):
+            if entry.name not in referenced:
+                os.unlink(entry.path)
+
+    def copy_assets(self, output_dir: Path = None):
+        """Sync images and other assets into an output tree.
 
-        # Generate pages
-        print(f"  Generating {lang} pages...")
-        self.generate_index_page(lang, output_dir)
-        self.generate_publications_page(lang, output_dir)
-        self.generate_projects_page(lang, output_dir)
-        self.generate_project_detail_pages(lang, output_dir)
+        Unchanged files are skipped and new ones hardlinked where possible.
+        Language subtrees link to the files already synced into the root
+        tree, so every asset exists once on disk. Images left over from
+        removed content are deleted.
+        """
+        if output_dir is None:
+            output_dir = self.output_dir
 
-        # For non-default language, copy static files and assets to subdirectory
-        # so relative paths work correctly
+        actions = {}
+        expected = set()
+        for src, logical in self.asset_files():
+            src_stat = self.content.stat(src)
+            # Share the root tree's copy when it is up to date
+            shared = self.output_dir / logical
+            if output_dir != self.output_dir and shared.exists() \
+                    and sync_file(src, shared, src_stat, self.output_mtime_ns) == 'unchanged':
+                src, src_stat = shared, None
+            for rel in {logical, self.asset_path(logical)}:
+                action = sync_file(src, output_dir / rel, src_stat, self.output_mtime_ns)
+                actions[action] = actions.get(action, 0) + 1
+                if action == 'copied':
+                    self.profiler.add_bytes(src.stat().st_size)
+                expected.add(rel)
+
+        # Delete orphaned content images
+        for section in ["project", "publication"]:
+            section_dir = output_dir / section
+            if not section_dir.exists():
+                continue
+            for path in sorted(section_dir.rglob('*'), reverse=True):
+                rel = path.relative_to(output_dir).as_posix()
+                if path.is_dir():
+                    if not any(path.iterdir()):
+                        path.rmdir()
+                elif rel not in expected:
+                    path.unlink()
+                    actions['removed'] = actions.get('removed', 0) + 1
+
+        self.remove_stale_fingerprints(output_dir)
+
+        summary = ', '.join(f"{count} {action}" for action, count in sorted(actions.items()))
+        print(f"  Assets in {output_dir}/: {summary or 'none'}")
+
+    def compress_formats(self) -> List[str]:
+        """Precompressed variants that can be written, as file suffixes"""
+        return ['gz', 'br'] if brotli is not None else ['gz']
+
+    def compress_outputs(self, jobs: int = 1, enabled: bool = True):
+        """Write .gz (and, with the brotli module, .br) siblings of text outputs.
+
+        Files whose content hash matches the record of the previous build are
+        skipped; the others are compressed at maximum level (on a worker pool
+        when jobs > 1). Siblings of removed or too small files, or all of them
+        when disabled, are deleted so they never go stale. Sizes are printed
+        and saved to .build-cache/compression-report.json.
+        """
+        previous = self.manifest.get('compressed', {})
+        self.compressed = {}
+        if not enabled and not previous:
+            return
+        formats = self.compress_formats()
+
+        pending = []
+        siblings = []
+        for root, dirs, files in os.walk(self.output_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(('.gz', '.br')):
+                    siblings.append(path)
+                    continue
+                if not enabled or name.startswith('.') or not name.endswith(COMPRESS_SUFFIXES):
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if len(data) < COMPRESS_MIN_SIZE:
+                    continue
+                rel = Path(path).relative_to(self.output_dir).as_posix()
+                record = {'hash': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+                old = previous.get(rel, {})
+                if old.get('hash') == record['hash'] and \
+                        all(fmt in old and os.path.exists(f"{path}.{fmt}") for fmt in formats):
+                    self.compressed[rel] = {**record, **{fmt: old[fmt] for fmt in formats}}
+                else:
+                    pending.append((rel, path))
+                    self.compressed[rel] = record
+
+        if pending:
+            if jobs <= 1:
+                results = [_compress_file(path, formats) for _, path in pending]
+            else:
+                with self.make_pool(jobs) as pool:
+                    results = list(pool.map(_compress_file, [path for _, path in pending],
+                                            [formats] * len(pending)))
+            for (rel, _), sizes in zip(pending, results):
+                self.compressed[rel].update(sizes)
+                self.profiler.add_bytes(sum(sizes.values()))
+
+        # Delete siblings that no longer belong to a compressed file
+        expected = {str(self.output_dir / f"{rel}.{fmt}") for rel in self.compressed for fmt in formats}
+        for path in siblings:
+            if path not in expected:
+                os.unlink(path)
+
+        if not enabled:
+            return
+        totals = {'size': 0, **{fmt: 0 for fmt in formats}}
+        for record in self.compressed.values():
+            for key in totals:
+                totals[key] += record[key]
+        report = self.cache_dir / "compression-report.json"
+        report.parent.mkdir(parents=True, exist_ok=True)
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump({'total': totals, 'files': dict(sorted(self.compressed.items()))}, f, indent=1)
+        ratios = ', '.join(f"{fmt} {totals[fmt] / 1024:.1f} KiB" for fmt in formats)
+        print(f"  {len(self.compressed)} text files ({len(pending)} compressed, "
+              f"{len(self.compressed) - len(pending)} unchanged): "
+              f"{totals['size'] / 1024:.1f} KiB -> {ratios}")
+
+    def prepare_language(self, lang: str, plan: Dict[str, List[str]]) -> List[str]:
+        """Create a language's output directories and load its author data.
+
+        Returns the pages of the language in the build plan that are stale
+        (see generate), in plan order. Content the
+        render workers share is loaded here, before any worker starts; markdown
+        bodies are only rendered by the pages that show them.
+        """
+        output_dir = self.lang_output_dir(lang)
+        (output_dir / "projects").mkdir(parents=True, exist_ok=True)
+        (output_dir / "search").mkdir(parents=True, exist_ok=True)
+
+        outputs = [out for out in plan if out in self.stale_outputs and self.output_lang(out) == lang]
+        if outputs:
+            self.load_author_data(lang)
+        return outputs
+
+    def copy_language_files(self, lang: str):
+        """For non-default languages, copy static files and assets to the
+        subdirectory so relative paths work correctly"""
         if lang != self.DEFAULT_LANG:
+            output_dir = self.lang_output_dir(lang)
             self.copy_static_files(output_dir)
             self.copy_assets(output_dir)
 
-    def compile_cv(self) -> list[subprocess.Popen]:
-        """Start xelatex compilation of CVs in the background. Returns process handles.
-        Skipped if SKIP_CV_COMPILE env var is set (e.g. when deploy.sh already compiled)."""
+    def cv_key(self, tex_file: Path) -> str:
+        """Hash of a CV source and every local file it depends on"""
+        digest = hashlib.sha256()
+        for dep in tex_dependencies(tex_file):
+            digest.update(f"{dep.relative_to(self.cv_dir).as_posix()}\0{hash_path(dep)}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+    def load_cv_cache(self) -> dict:
+        """CV source name -> cv_key of its last successful compilation"""
+        try:
+            with open(self.cache_dir / "cv.json", encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def compile_cv(self) -> list:
+        """Start compiling the CVs whose sources changed, in the background.
+
+        A CV is reused when its PDF exists and the hash of its .tex file and
+        local dependencies (see tex_dependencies) matches the last successful
+        compilation. Returns (tex name, key, future) tuples for collect_cv.
+        Skipped if SKIP_CV_COMPILE env var is set."""
         if os.environ.get("SKIP_CV_COMPILE"):
             print("Skipping CV compilation (SKIP_CV_COMPILE is set)")
             return []
-        cv_dir = Path("CV-Overleaf")
-        procs = []
+        cache = self.load_cv_cache()
+        stale = []
         for tex_name in ["main.tex", "main_zh.tex"]:
-            tex_file = cv_dir / tex_name
+            tex_file = self.cv_dir / tex_name
             if not tex_file.exists():
                 continue
-            print(f"Starting CV compilation ({tex_name})...")
-            try:
-                proc = subprocess.Popen(
-                    ["xelatex", "-interaction=nonstopmode", "-halt-on-error", tex_name],
-                    cwd=cv_dir,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                )
-                procs.append((tex_name, proc))
-            except FileNotFoundError:
+            key = self.cv_key(tex_file)
+            if cache.get(tex_name) == key and tex_file.with_suffix(".pdf").exists():
+                print(f"CV {tex_name} is up to date")
+                continue
+            if shutil.which("xelatex") is None:
                 print("Warning: xelatex not found, skipping CV compilation.")
                 break
+            print(f"Starting CV compilation ({tex_name})...")
+            stale.append((tex_name, key))
+        if not stale:
+            return []
+
+        pool = ThreadPoolExecutor(len(stale))
+        procs = [(tex_name, key, pool.submit(self.run_xelatex, tex_name)) for tex_name, key in stale]
+        pool.shutdown(wait=False)
         return procs
 
+    def run_xelatex(self, tex_name: str) -> tuple:
+        """Compile a CV, running another pass only while LaTeX asks for one
+        (changed labels, references or outline), up to CV_MAX_PASSES.
+        Returns (exit code, passes, seconds, output of the last pass)."""
+        start = time.perf_counter()
+        log_file = (self.cv_dir / tex_name).with_suffix(".log")
+        for passes in range(1, CV_MAX_PASSES + 1):
+            result = subprocess.run(
+                ["xelatex", "-interaction=nonstopmode", "-halt-on-error", tex_name],
+                cwd=self.cv_dir,
+                env=self.xelatex_env(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            if result.returncode != 0:
+                break
+            try:
+                log = log_file.read_text(encoding='utf-8', errors='replace')
+            except OSError:
+                log = result.stdout.decode(errors="replace")
+            if "Rerun" not in log:
+                break
+        return result.returncode, passes, time.perf_counter() - start, result.stdout.decode(errors="replace")
+
+    def xelatex_env(self) -> dict | None:
+        """Environment for xelatex: in deterministic builds, the build date
+        replaces the current time in the PDF (dates and \\today)"""
+        if self.output_mtime_ns is None:
+            return None
+        epoch = str(int(self.build_date.timestamp()))
+        return {**os.environ, 'SOURCE_DATE_EPOCH': epoch, 'FORCE_SOURCE_DATE': '1'}
+
     def collect_cv(self, procs: list):
         """Wait for CV compilations to finish and copy PDFs to dist/uploads/."""
-        for tex_name, proc in procs:
-            stdout, _ = proc.communicate()
+        cache = self.load_cv_cache()
+        for tex_name, key, future in procs:
+            returncode, passes, seconds, output = future.result()
             pdf_name = tex_name.replace(".tex", ".pdf")
-            if proc.returncode != 0:
-                print(f"Warning: xelatex compilation failed for {tex_name}:")
-                print(stdout.decode(errors="replace")[-2000:])
+            if returncode != 0:
+                print(f"Warning: xelatex compilation failed for {tex_name} after {seconds:.1f}s:")
+                print(output[-2000:])
             else:
-                print(f"CV compilation succeeded: {pdf_name}")
+                print(f"CV compilation succeeded: {pdf_name} "
+                      f"({passes} pass{'es' if passes != 1 else ''}, {seconds:.1f}s)")
+                cache[tex_name] = key
+        if procs:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self.cache_dir / "cv.json") as f:
+                f.write(json.dumps(cache, indent=1, sort_keys=True).encode('utf-8'))
 
         # Copy English CV to both en and zh dist
-        cv_dir = Path("CV-Overleaf")
-        pdf_en = cv_dir / "main.pdf"
-        pdf_zh = cv_dir / "main_zh.pdf"
+        pdf_en = self.cv_dir / "main.pdf"
+        pdf_zh = self.cv_dir / "main_zh.pdf"
 
         if pdf_en.exists():
-            uploads = self.output_dir / "uploads"
-            uploads.mkdir(parents=True, exist_ok=True)
-            shutil.copy(pdf_en, uploads / "resume.pdf")
+            sync_file(pdf_en, self.output_dir / "uploads" / "resume.pdf", mtime_ns=self.output_mtime_ns)
             # Also copy to zh if no Chinese CV
-            zh_uploads = self.output_dir / "zh" / "uploads"
-            zh_uploads.mkdir(parents=True, exist_ok=True)
-            if pdf_zh.exists():
-                shutil.copy(pdf_zh, zh_uploads / "resume.pdf")
-            else:
-                shutil.copy(pdf_en, zh_uploads / "resume.pdf")
-            print("CV PDFs copied to dist/uploads/")
+            zh_resume = self.output_dir / "zh" / "uploads" / "resume.pdf"
+            sync_file(pdf_zh if pdf_zh.exists() else pdf_en, zh_resume, mtime_ns=self.output_mtime_ns)
+            print(f"CV PDFs copied to {self.output_dir}/uploads/")
         else:
             print("Warning: No CV PDF found at CV-Overleaf/main.pdf")
 
-    def generate(self):
-        """Main generation process"""
+    def set_build_date(self, deterministic: bool = False):
+        """Fix the date the build stamps into pages (the footer's year).
+
+        It is SOURCE_DATE_EPOCH when set, else the time of the last commit in
+        deterministic builds and the current time otherwise. Deterministic
+        builds also give every output file SOURCE_DATE_EPOCH (or else
+        DETERMINISTIC_MTIME) as mtime.
+        """
+        epoch = source_date_epoch()
+        self.output_mtime_ns = None
+        if deterministic:
+            self.output_mtime_ns = (epoch if epoch is not None else DETERMINISTIC_MTIME) * 10**9
+        if epoch is None and deterministic:
+            result = subprocess.run(["git", "log", "-1", "--format=%ct"], stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, text=True)
+            if result.returncode != 0 or not result.stdout.strip():
+                raise BuildError("Deterministic builds need SOURCE_DATE_EPOCH or a git checkout")
+            epoch = int(result.stdout)
+        self.build_date = datetime.fromtimestamp(epoch, timezone.utc) if epoch is not None else datetime.now()
+
+    def generate(self, force: bool = False, jobs: int = 1, cv: bool = True, compress: bool = False,
+                 optimize: bool = False, langs: List[str] = None, only: List[str] = None,
+                 assets: bool = True, deterministic: bool = False):
+        """Main generation process.
+
+        Pages whose inputs are unchanged since the last run (according to the
+        build manifest) are skipped unless force is set. With jobs > 1 the
+        pages of all languages are rendered on a pool of that many workers.
+        cv=False skips CV compilation and copying. compress=True writes
+        precompressed .gz/.br siblings of the text outputs. optimize=True
+        minifies HTML/CSS/JS and inlines each page's critical CSS.
+
+        langs and only restrict the build to some languages and targets (see
+        select_outputs). Such a partial build leaves the manifest untouched,
+        so the next full build still brings every other page up to date.
+        assets=False skips copying static files, images and other assets.
+
+        deterministic=True makes the output tree a function of the sources
+        only: fixed build date, no hardlinks to sources, and normalized
+        mtimes and permissions (see set_build_date and normalize_tree).
+        """
         print("Starting homepage generation...")
+        self.optimize = optimize
+        self.cv = cv
+        self.set_build_date(deterministic)
+        self.markdown_cache.begin_run()
+        partial = bool(langs or only)
+        langs = [lang for lang in self.SUPPORTED_LANGS if not langs or lang in langs]
+        span = self.profiler.span
 
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
 
         # Start CV compilation early (runs in background)
-        cv_proc = self.compile_cv()
+        with span('compile_cv'):
+            cv_proc = self.compile_cv() if cv else []
 
         # Load translations
         print("Loading translations...")
-        self.load_translations()
+        with span('load_translations'):
+            self.load_translations()
 
-        # Load shared content (publications, projects, config)
+        # Load shared content (publications, projects); only frontmatter is
+        # parsed, which is needed to plan the build. The site config is
+        # reloaded on first use.
         print("Loading content...")
-        self.load_publications()
-        self.load_projects()
-        self.load_config()
-
-        # Generate pages for each language
-        for lang in self.SUPPORTED_LANGS:
-            self.generate_for_language(lang)
+        with span('scan_content'):
+            self.scan_content()
+            self.config = None
+            self.search_indexes = {}
+            self.fragments = {}
+        with span('load_publications'):
+            self.load_publications(jobs)
+        with span('load_projects'):
+            self.load_projects(jobs)
+
+        # Work out which pages need rebuilding
+        with span('plan_pages'):
+            self.input_hashes = {}
+            if force:
+                self.manifest = {'inputs': {}, 'outputs': {}}
+            else:
+                self.load_manifest()
+            plan = self.plan_pages()
+            selected = self.select_outputs(plan, langs, only) if partial else plan
+            self.stale_outputs = {out for out in selected if force or self.is_stale(out, plan[out])}
+            print(f"{len(self.stale_outputs)} of {len(selected)} pages need rebuilding")
+            self.remove_orphaned_pages(plan)
+
+        # Image variants are needed by both the pages and the asset sync
+        print("Processing images...")
+        with span('process_images'):
+            self.process_images(jobs)
+        with span('fingerprint_assets'):
+            self.fingerprint_assets()
+
+        # Generate pages for all languages in one batch
+        with span('load_author_data'):
+            outputs = []
+            for lang in langs:
+                outputs += self.prepare_language(lang, plan)
+        if outputs:
+            print(f"Generating {len(outputs)} pages ({jobs} job{'s' if jobs != 1 else ''})...")
+            with span('render_pages'):
+                self.render_pages(outputs, jobs)
+
+        # Copy static files and assets to root (for default language) first,
+        # so the other language trees can share them
+        if assets:
+            print("Copying static files...")
+            with span('copy_static_files'):
+                self.copy_static_files()
+
+            print("Copying assets...")
+            with span('copy_assets'):
+                self.copy_assets()
+                for lang in langs:
+                    self.copy_language_files(lang)
+
+            # Copy CNAME file for GitHub Pages custom domain
+            cname_src = Path("CNAME")
+            if cname_src.exists():
+                sync_file(cname_src, self.output_dir / "CNAME", mtime_ns=self.output_mtime_ns)
+                print(f"CNAME copied to {self.output_dir}/")
+
+        # Precompressed siblings for static hosts; stale ones are removed even
+        # when compression is off (but not by a partial build)
+        if compress:
+            print("Compressing text files...")
+        if compress or not partial:
+            with span('compress_outputs'):
+                self.compress_outputs(jobs, enabled=compress)
+
+        with span('save_manifest'):
+            if partial:
+                print("Partial build: build manifest left unchanged")
+            else:
+                self.save_manifest(plan)
+            self.markdown_cache.prune()
 
-        # Copy static files and assets to root (for default language)
-        print("Copying static files...")
-        self.copy_static_files()
+        # Wait for CV compilation and copy result
+        if cv:
+            with span('collect_cv'):
+                self.collect_cv(cv_proc)
 
-        print("Copying assets...")
-        self.copy_assets()
+        if self.output_mtime_ns is not None:
+            with span('normalize_outputs'):
+                normalize_tree(self.output_dir, self.output_mtime_ns)
 
-        # Copy CNAME file for GitHub Pages custom domain
-        cname_src = Path("CNAME")
-        if cname_src.exists():
-            shutil.copy(cname_src, self.output_dir / "CNAME")
-            print("CNAME copied to dist/")
+        print(f"Homepage generated successfully in {self.output_dir}/")
+        if 'en' in langs:
+            print(f"  English: {self.output_dir}/index.html")
+        if 'zh' in langs:
+            print(f"  Chinese: {self.output_dir}/zh/index.html")
+
+    def check_reproducible(self, build_args: List[str] = (), jobs: int = 1) -> bool:
+        """Build the site twice from scratch in deterministic mode and compare
+        the two trees byte for byte (see compare_trees).
+
+        The builds are separate processes with different hash seeds, the
+        first serial and the second on jobs workers, so neither set ordering
+        nor scheduling can hide. Each one gets its own empty cache directory,
+        so neither reuses the other's (or the real build's) cached work, and
+        the CV is not compiled (it would rewrite CV-Overleaf/main.pdf).
+        build_args are passed to both builds.
+        """
+        with tempfile.TemporaryDirectory(prefix='homepage-check-') as tmp:
+            trees = []
+            for run, run_jobs in enumerate([1, jobs], 1):
+                output_dir = Path(tmp) / str(run)
+                cache_dir = Path(tmp) / f"cache-{run}"
+                print(f"Reproducibility check: build {run} of 2 ({run_jobs} job{'s' if run_jobs != 1 else ''})...")
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), 'build', '--deterministic', '--force',
+                     '--skip', 'cv', '-j', str(run_jobs), '-o', str(output_dir),
+                     '--cache-dir', str(cache_dir), *build_args],
+                    env={**os.environ, 'PYTHONHASHSEED': str(run)},
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                )
+                if result.returncode != 0:
+                    print(result.stdout[-2000:])
+                    raise BuildError(f"Reproducibility check: build {run} failed")
+                trees.append(output_dir)
+
+            diffs = compare_trees(*trees)
+            files = sum(len(names) for _, _, names in os.walk(trees[0]))
+        for diff in diffs[:50]:
+            print(f"  {diff}")
+        if diffs:
+            print(f"Build is not reproducible: {len(diffs)} difference(s)")
+        else:
+            print(f"Build is reproducible: {files} files identical")
+        return not diffs
 
-        # Wait for CV compilation and copy result
-        self.collect_cv(cv_proc)
+    def serve(self, host: str = '127.0.0.1', port: int = 8000, jobs: int = 1, force: bool = False,
+              cv: bool = True, **options):
+        """Build, serve the output over HTTP and rebuild on changes.
 
-        print(f"Homepage generated successfully in {self.output_dir}/")
-        print(f"  English: {self.output_dir}/index.html")
-        print(f"  Chinese: {self.output_dir}/zh/index.html")
+        content/, templates/ and i18n/ are watched; each change triggers an
+        incremental generate() (so only affected pages are re-rendered) and
+        then reloads every open browser tab. options (see generate) are
+        passed to every generate(); force and cv only apply to the first.
+        """
+        self.generate(force=force, jobs=jobs, cv=cv, **options)
+
+        reload_state = LiveReloadState()
+        handler = type('Handler', (LiveReloadHandler,), {'reload_state': reload_state})
+        output_dir = str(self.output_dir)
+        server = ThreadingHTTPServer((host, port), lambda *args: handler(*args, directory=output_dir))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        watcher = ChangeWatcher([self.content_dir, self.template_dir, self.i18n_dir])
+        print(f"Serving {self.output_dir}/ at http://{host}:{port}/ "
+              f"(watching with {watcher.backend}, Ctrl+C to stop)")
+        try:
+            while True:
+                changed = watcher.wait()
+                print(f"\nChanged: {', '.join(sorted(changed)[:5])}{' ...' if len(changed) > 5 else ''}")
+                start = time.perf_counter()
+                try:
+                    self.generate(jobs=jobs, cv=False, **options)
+                except BuildError as exc:
+                    print(f"Build failed: {exc}")
+                    continue
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+                reload_state.bump()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.stop()
+            server.shutdown()
 
 
 if __name__ == "__main__":
-    generator = PersonalHomepageGenerator()
-    generator.generate()
+    parser = argparse.ArgumentParser(description="Generate the personal homepage (into dist/ by default)")
+    langs = PersonalHomepageGenerator.SUPPORTED_LANGS
+    parser.add_argument('command', nargs='?', default='build', choices=['build', 'serve'],
+                        help="'build' (default) or 'serve' to rebuild on changes with live reload")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build manifest and rebuild every page")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of parallel render workers (0 = one per CPU)")
+    parser.add_argument('--watch', action='store_true', help="same as the 'serve' command")
+    parser.add_argument('--profile', nargs='?', const='.build-cache/build-profile.json', metavar='TRACE',
+                        help="print a timing table and save a Chrome trace "
+                             "(default: .build-cache/build-profile.json)")
+    parser.add_argument('--graph', action='store_true',
+                        help="print the dependency graph (input -> pages it invalidates) and exit")
+    parser.add_argument('--compress', action='store_true',
+                        help="also write gzip (and Brotli, if installed) compressed copies of text files")
+    parser.add_argument('--optimize', action='store_true',
+                        help="minify HTML/CSS/JS and inline each page's critical CSS")
+    parser.add_argument('--deterministic', action='store_true',
+                        help="byte-reproducible output: build date from SOURCE_DATE_EPOCH (or the last "
+                             "commit), normalized mtimes and permissions, no hardlinks to sources")
+    parser.add_argument('--check-reproducible', action='store_true',
+                        help="build twice in deterministic mode and compare the results byte for byte")
+    parser.add_argument('--lang', action='append', choices=langs, dest='langs',
+                        help="only build this language (repeatable)")
+    parser.add_argument('--only', action='append', metavar='TARGET',
+                        help="only build index, publications, projects, search or project/<slug> "
+                             "(repeatable); partial builds leave the manifest unchanged")
+    parser.add_argument('--skip', action='append', choices=['assets', 'cv'], default=[],
+                        help="skip a phase: copying assets, or compiling the CV (repeatable)")
+    parser.add_argument('-o', '--output', default='dist', help="output directory (default: dist)")
+    parser.add_argument('--cache-dir', default='.build-cache',
+                        help="directory for cached build work (default: .build-cache)")
+    parser.add_argument('--port', type=int, default=8000, help="port for 'serve' (default: 8000)")
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+    options = {'langs': args.langs, 'only': args.only, 'assets': 'assets' not in args.skip,
+               'cv': 'cv' not in args.skip, 'compress': args.compress, 'optimize': args.optimize,
+               'deterministic': args.deterministic}
+    if args.profile and (args.command == 'serve' or args.watch):
+        parser.error("argument --profile: not supported with 'serve'")
+
+    generator = PersonalHomepageGenerator(output_dir=args.output, cache_dir=args.cache_dir)
+    for target in args.only or []:
+        error = generator.build_target_error(target)
+        if error:
+            parser.error(f"argument --only: invalid target '{target}': {error}")
+    try:
+        if args.graph:
+            generator.print_dependency_graph()
+        elif args.check_reproducible:
+            build_args = ['--optimize'] * args.optimize + ['--compress'] * args.compress
+            build_args += ['--skip', 'assets'] * ('assets' in args.skip)
+            if not generator.check_reproducible(build_args, jobs):
+                sys.exit(1)
+        elif args.command == 'serve' or args.watch:
+            generator.serve(port=args.port, jobs=jobs, force=args.force, **options)
+        else:
+            generator.profiler.enabled = bool(args.profile)
+            with generator.profiler.span('generate'):
+                generator.generate(force=args.force, jobs=jobs, **options)
+            if args.profile:
+                print()
+                print(generator.profiler.report())
+                generator.profiler.write_trace(Path(args.profile))
+                print(f"\nChrome trace written to {args.profile}")
+    except BuildError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
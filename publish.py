@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Publisher for the built site
+Commits dist/ to the gh-pages branch with git plumbing, without a worktree or
+index: files unchanged since the last publish reuse their blob hash, only
+blobs missing from the repository are written, and the tree and commit are
+created with mktree and commit-tree (then optionally pushed)
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from generator import MANIFEST_NAME, atomic_write
+
+# Stat signature and blob hash of every published file, see blob_hashes
+PUBLISH_CACHE = Path('.build-cache') / 'publish.json'
+FILE_MODE = '100644'
+TREE_MODE = '040000'
+
+
+def git(*args: str, input: bytes = None) -> str:
+    """Run a git command and return its stripped output (raises on failure)"""
+    result = subprocess.run(['git', *args], input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout.decode().strip()
+
+
+def resolve(ref: str) -> str | None:
+    """Commit a ref points to, or None if it doesn't exist"""
+    result = subprocess.run(['git', 'rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return result.stdout.decode().strip() if result.returncode == 0 else None
+
+
+def site_files(build_dir: Path) -> dict:
+    """Files to publish as {path relative to build_dir: stat}. The build
+    manifest is bookkeeping, not part of the site."""
+    files = {}
+    for root, dirs, names in os.walk(build_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = Path(root) / name
+            rel = path.relative_to(build_dir).as_posix()
+            if rel != MANIFEST_NAME and path.is_file() and not path.is_symlink():
+                files[rel] = path.stat()
+    return files
+
+
+def blob_hashes(build_dir: Path, files: dict, object_format: str) -> tuple[dict, list]:
+    """Git blob hash of every file, and the files that had to be hashed.
+
+    A file whose size, mtime, ctime and inode match the last publish (the
+    same check git's index does) reuses its hash without being read; the
+    others are hashed here the way git hashes blobs.
+    """
+    try:
+        with open(PUBLISH_CACHE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if cache.get('build_dir') != str(build_dir.resolve()) or cache.get('format') != object_format:
+        cache = {}
+    known = cache.get('files', {})
+
+    hashes, hashed = {}, []
+    for rel, st in files.items():
+        signature = [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+        entry = known.get(rel)
+        if entry and entry[:4] == signature:
+            hashes[rel] = entry[4]
+            continue
+        data = (build_dir / rel).read_bytes()
+        digest = hashlib.new(object_format, f"blob {len(data)}\0".encode())
+        digest.update(data)
+        hashes[rel] = digest.hexdigest()
+        hashed.append(rel)
+
+    cache = {
+        'build_dir': str(build_dir.resolve()),
+        'format': object_format,
+        'files': {rel: [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino, hashes[rel]]
+                  for rel, st in files.items()},
+    }
+    PUBLISH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(PUBLISH_CACHE) as f:
+        f.write(json.dumps(cache).encode('utf-8'))
+    return hashes, hashed
+
+
+def write_blobs(build_dir: Path, hashes: dict) -> list:
+    """Add the blobs the repository doesn't have yet; returns their paths"""
+    by_hash = {}
+    for rel, blob in hashes.items():
+        by_hash.setdefault(blob, rel)
+    if not by_hash:
+        return []
+    status = git('cat-file', '--batch-check', input='\n'.join(by_hash).encode() + b'\n')
+    missing = [by_hash[line.split()[0]] for line in status.splitlines() if line.endswith(' missing')]
+    if missing:
+        paths = '\n'.join(str(build_dir / rel) for rel in missing) + '\n'
+        written = git('hash-object', '-w', '--no-filters', '--stdin-paths', input=paths.encode()).split()
+        for rel, blob in zip(missing, written):
+            if blob != hashes[rel]:
+                raise RuntimeError(f"{rel} changed while it was being published")
+    return missing
+
+
+def write_tree(hashes: dict) -> str:
+    """Write the (nested) tree of the given files; returns the root tree hash"""
+    root = {}
+    for rel, blob in hashes.items():
+        *parents, name = rel.split('/')
+        node = root
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[name] = blob
+
+    mktree = subprocess.Popen(['git', 'mktree', '-z', '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def write(node: dict) -> str:
+        # Subtrees first: a tree needs the hashes of its children
+        entries = []
+        for name, child in sorted(node.items()):
+            if isinstance(child, dict):
+                entries.append(f"{TREE_MODE} tree {write(child)}\t{name}\0")
+            else:
+                entries.append(f"{FILE_MODE} blob {child}\t{name}\0")
+        mktree.stdin.write(''.join(entries).encode('utf-8') + b'\0')
+        mktree.stdin.flush()
+        tree = mktree.stdout.readline().decode().strip()
+        if not tree:
+            raise RuntimeError("git mktree failed")
+        return tree
+
+    try:
+        return write(root)
+    finally:
+        mktree.stdin.close()
+        mktree.wait()
+
+
+def publish(build_dir: Path, branch: str = 'gh-pages', remote: str = None, message: str = None) -> str | None:
+    """Commit build_dir as the new tree of branch, and push it to remote.
+
+    The commit's parent is the remote's branch when pushing (fetched first),
+    else the local one. Returns the new commit, or None when the site is
+    unchanged.
+    """
+    if not build_dir.is_dir():
+        raise RuntimeError(f"{build_dir}/ not found. Build the site first.")
+    ref = f'refs/heads/{branch}'
+    old = resolve(ref)
+    parent = old
+    if remote:
+        tracking = f'refs/remotes/{remote}/{branch}'
+        if subprocess.run(['git', 'ls-remote', '--exit-code', '--heads', remote, branch],
+                          stdout=subprocess.DEVNULL).returncode == 0:
+            git('fetch', '--quiet', remote, f'+{ref}:{tracking}')
+            parent = resolve(tracking)
+
+    object_format = git('rev-parse', '--show-object-format')
+    files = site_files(build_dir)
+    hashes, hashed = blob_hashes(build_dir, files, object_format)
+    written = write_blobs(build_dir, hashes)
+    tree = write_tree(hashes)
+    size = sum(files[rel].st_size for rel in written)
+    print(f"  {len(files)} files: {len(hashed)} hashed, {len(written)} new blobs ({size / 1024:.1f} KiB)")
+
+    if parent and git('rev-parse', f'{parent}^{{tree}}') == tree:
+        if parent != old:
+            git('update-ref', ref, parent)
+        print("    No changes to deploy.")
+        return None
+
+    message = message or f"Deploy site {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    commit = git('commit-tree', tree, *(['-p', parent] if parent else []), '-m', message)
+    git('update-ref', '-m', f'publish: {message}', ref, commit, old or '0' * len(commit))
+    print(f"    Committed {commit[:10]} to {branch}")
+    if remote:
+        subprocess.run(['git', 'push', remote, f'{ref}:{ref}'], check=True)
+        print(f"    Deployed to {remote}/{branch} successfully.")
+    return commit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commit the built site to the gh-pages branch")
+    parser.add_argument('-d', '--dir', default='dist', help="build output to publish (default: dist)")
+    parser.add_argument('-b', '--branch', default='gh-pages', help="branch to commit to (default: gh-pages)")
+    parser.add_argument('--push', metavar='REMOTE', help="push the branch to this remote (e.g. origin)")
+    parser.add_argument('-m', '--message', help="commit message (default: 'Deploy site <date>')")
+    args = parser.parse_args()
+    publish(Path(args.dir), args.branch, args.push, args.message)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,7 @@ themeToggle.addEventListener('click', () => {
     
     html.setAttribute('data-theme', newTheme);
     localStorage.setItem('theme', newTheme);
-    
-    // Update icon
-    const icon = themeToggle.querySelector('i');
-    icon.className = newTheme === 'light' ? 'fas fa-moon' : 'fas fa-sun';
+    // The button shows the moon or the sun icon through CSS (data-theme)
 });
 
 // Smooth scrolling for anchor links
@@ -53,4 +50,227 @@ window.addEventListener('scroll', () => {
             link.classList.add('active');
         }
     });
-});
\ No newline at end of file
+});
+// Listing pages (publications, projects): the HTML carries the first page of
+// items; further pages and filtering come from the page's JSON index, which
+// is only fetched once it is needed.
+function setupListing({ list, search, noResults, more, chips, chipKey, filter, itemKey }) {
+    const total = Number(list.dataset.total);
+    const pageSize = Number(list.dataset.pageSize);
+    const complete = list.children.length >= total;
+    let index = null;
+    let matches = null;
+    let shown = list.children.length;
+    let activeChip = 'all';
+    let queue = Promise.resolve();
+
+    // Every item is already on the page: build the index from the DOM
+    function indexFromDom() {
+        const data = { items: [], [filter]: {} };
+        Array.from(list.children).forEach((item, number) => {
+            data.items.push({ html: item.outerHTML, text: item.textContent.toLowerCase() });
+            (item.dataset[itemKey] || '').split(', ').filter(Boolean).forEach(value => {
+                (data[filter][value] = data[filter][value] || []).push(number);
+            });
+        });
+        return data;
+    }
+
+    function loadIndex() {
+        if (!index) {
+            index = complete
+                ? Promise.resolve(indexFromDom())
+                : fetch(list.dataset.index).then(response => {
+                    if (!response.ok) throw new Error(`${list.dataset.index}: ${response.status}`);
+                    return response.json();
+                });
+            index.catch(() => { index = null; });
+        }
+        return index;
+    }
+
+    function findMatches(data) {
+        const query = search.value.trim().toLowerCase();
+        const candidates = activeChip === 'all'
+            ? data.items.map((_, number) => number)
+            : data[filter][activeChip] || [];
+        return candidates.filter(number => !query || data.items[number].text.includes(query));
+    }
+
+    function showPage(data, start) {
+        const page = matches.slice(start, start + pageSize);
+        list.insertAdjacentHTML('beforeend', page.map(number => data.items[number].html).join(''));
+        shown = start + page.length;
+        more.hidden = shown >= matches.length;
+        noResults.style.display = matches.length ? 'none' : 'block';
+    }
+
+    // Renders run one at a time, in the order they were requested
+    function enqueue(step) {
+        queue = queue.then(loadIndex).then(step).catch(error => console.error(error));
+    }
+
+    function update() {
+        enqueue(data => {
+            matches = findMatches(data);
+            list.innerHTML = '';
+            showPage(data, 0);
+        });
+    }
+
+    function showMore() {
+        enqueue(data => {
+            if (!matches) matches = findMatches(data);
+            if (shown < matches.length) showPage(data, shown);
+        });
+    }
+
+    search.addEventListener('input', update);
+
+    chips.forEach(chip => {
+        chip.addEventListener('click', () => {
+            chips.forEach(c => c.classList.remove('active'));
+            chip.classList.add('active');
+            activeChip = chip.dataset[chipKey];
+            update();
+        });
+    });
+
+    more.querySelector('button').addEventListener('click', showMore);
+
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting) && !more.hidden) showMore();
+        }, { rootMargin: '200px' }).observe(more);
+    }
+}
+
+// Site search. Terms are split and sharded exactly like search_tokens() and
+// search_shard() in generator.py; the result records and each shard are
+// fetched from <language root>/search/ the first time they are needed.
+const SEARCH_WORD = /[\p{L}\p{N}]+/gu;
+const CJK_RUN = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+/g;
+const SEARCH_RESULTS = 10;
+
+function searchTokens(text) {
+    const tokens = [];
+    for (const [word] of text.normalize('NFKC').toLowerCase().matchAll(SEARCH_WORD)) {
+        let pos = 0;
+        for (const run of word.matchAll(CJK_RUN)) {
+            if (run.index > pos) tokens.push(word.slice(pos, run.index));
+            const chars = run[0];
+            if (chars.length === 1) tokens.push(chars);
+            for (let i = 0; i + 1 < chars.length; i++) tokens.push(chars.slice(i, i + 2));
+            pos = run.index + chars.length;
+        }
+        if (pos < word.length) tokens.push(word.slice(pos));
+    }
+    return tokens;
+}
+
+function searchShard(term, shards) {
+    return term.codePointAt(0) % shards;
+}
+
+function setupSearch(box) {
+    const input = box.querySelector('input');
+    const results = box.querySelector('.site-search-results');
+    const root = new URL(box.dataset.root, location.href);
+    const cache = {};
+    let latest = 0;
+
+    function load(name) {
+        if (!cache[name]) {
+            cache[name] = fetch(new URL(`search/${name}.json`, root)).then(response => {
+                if (!response.ok) throw new Error(`search/${name}.json: ${response.status}`);
+                return response.json();
+            });
+            cache[name].catch(() => { delete cache[name]; });
+        }
+        return cache[name];
+    }
+
+    // Document number -> summed weight of the index terms matching one query term
+    async function termScores(term, shards, prefix) {
+        const shard = await load(searchShard(term, shards));
+        const terms = prefix
+            ? Object.keys(shard).filter(t => t.startsWith(term))
+            : Object.prototype.hasOwnProperty.call(shard, term) ? [term] : [];
+        const scores = new Map();
+        terms.forEach(t => {
+            let number = 0;
+            for (let i = 0; i < shard[t].length; i += 2) {
+                number += shard[t][i];
+                scores.set(number, (scores.get(number) || 0) + shard[t][i + 1]);
+            }
+        });
+        return scores;
+    }
+
+    // Documents containing every term, best first; the last word of the
+    // query may still be incomplete, so it is matched as a prefix
+    async function search(query) {
+        const terms = searchTokens(query);
+        const index = await load('docs');
+        const prefix = !/\s$/.test(query);
+        const scores = await Promise.all(terms.map((term, i) =>
+            termScores(term, index.shards, prefix && i === terms.length - 1)));
+        const [first, ...rest] = scores;
+        return [...first]
+            .filter(([number]) => rest.every(s => s.has(number)))
+            .map(([number, score]) => [number, rest.reduce((sum, s) => sum + s.get(number), score)])
+            .sort((a, b) => b[1] - a[1])
+            .slice(0, SEARCH_RESULTS)
+            .map(([number]) => index.docs[number]);
+    }
+
+    function show(docs) {
+        results.replaceChildren(...docs.map(doc => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            const title = document.createElement('strong');
+            link.href = new URL(doc.url, root).href;
+            title.textContent = doc.title;
+            link.append(title);
+            if (doc.info) {
+                const info = document.createElement('span');
+                info.textContent = doc.info;
+                link.append(info);
+            }
+            item.append(link);
+            return item;
+        }));
+        if (!docs.length) {
+            const empty = document.createElement('li');
+            empty.className = 'site-search-empty';
+            empty.textContent = box.dataset.noResults;
+            results.append(empty);
+        }
+        results.hidden = false;
+    }
+
+    input.addEventListener('focus', () => load('docs'));
+
+    input.addEventListener('input', () => {
+        const query = input.value;
+        const current = ++latest;
+        if (!searchTokens(query).length) {
+            results.hidden = true;
+            return;
+        }
+        search(query)
+            .then(docs => { if (current === latest) show(docs); })
+            .catch(error => console.error(error));
+    });
+
+    input.addEventListener('keydown', event => {
+        if (event.key === 'Escape') results.hidden = true;
+    });
+
+    document.addEventListener('click', event => {
+        if (!box.contains(event.target)) results.hidden = true;
+    });
+}
+
+const siteSearch = document.getElementById('site-search');
+if (siteSearch) setupSearch(siteSearch);
@@ -0,0 +1,113 @@
+"""Incremental builds: which pages the build manifest marks as stale"""
+
+import io
+import shutil
+from contextlib import redirect_stdout
+
+import pytest
+
+from benchmark import generate_content
+from conftest import REPO
+from generator import MANIFEST_NAME, SEARCH_SHARDS, PersonalHomepageGenerator
+
+LANG_PREFIXES = ['', 'zh/']
+SEARCH_FILES = ['search/docs.json'] + [f'search/{shard}.json' for shard in range(SEARCH_SHARDS)]
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """A small synthetic site with its own templates, built once"""
+    shutil.copytree(REPO / "templates", tmp_path / "templates")
+    shutil.copytree(REPO / "i18n", tmp_path / "i18n")
+    generate_content(tmp_path / "content", publications=12, projects=8, body_kb=1, code_blocks=1, gallery=1)
+    monkeypatch.chdir(tmp_path)
+    build()
+    return tmp_path
+
+
+def build(**options) -> set:
+    """Build into dist/ and return the pages that were rendered"""
+    generator = PersonalHomepageGenerator()
+    generator.profiler.enabled = True
+    with redirect_stdout(io.StringIO()):
+        generator.generate(cv=False, assets=False, **options)
+    return {event['name'] for event in generator.profiler.events if event['cat'] == 'page'}
+
+
+def loaded_generator() -> PersonalHomepageGenerator:
+    generator = PersonalHomepageGenerator()
+    with redirect_stdout(io.StringIO()):
+        generator.load_translations()
+        generator.scan_content()
+        generator.load_publications()
+        generator.load_projects()
+    return generator
+
+
+def per_lang(*pages: str) -> set:
+    return {prefix + page for prefix in LANG_PREFIXES for page in pages}
+
+
+def test_unchanged_site_renders_nothing(site):
+    assert build() == set()
+
+
+def test_project_edit_rebuilds_its_pages_and_listings(site):
+    # The oldest project is not previewed on the index page
+    slug = loaded_generator().projects[-1].slug
+    with open(site / "content" / "project" / slug / "index.md", 'a', encoding='utf-8') as f:
+        f.write("\nOne more paragraph.\n")
+
+    assert build() == per_lang(f'projects/{slug}.html', 'projects.html', 'projects.json', *SEARCH_FILES)
+    assert build() == set()
+
+
+def test_previewed_publication_edit_rebuilds_index(site):
+    slug = loaded_generator().publications[0].slug
+    with open(site / "content" / "publication" / slug / "index.md", 'a', encoding='utf-8') as f:
+        f.write("\nOne more paragraph.\n")
+
+    assert build() == per_lang('index.html', 'publications.html', 'publications.json', *SEARCH_FILES)
+
+
+def test_template_edit_rebuilds_pages_using_it(site):
+    slugs = [proj.slug for proj in loaded_generator().projects]
+    with open(site / "templates" / "project_detail.html", 'a', encoding='utf-8') as f:
+        f.write("\n{# edited #}\n")
+
+    assert build() == per_lang(*[f'projects/{slug}.html' for slug in slugs])
+
+
+def test_missing_output_is_rebuilt(site):
+    (site / "dist" / "zh" / "publications.html").unlink()
+
+    assert build() == {'zh/publications.html'}
+
+
+def test_option_change_rebuilds_every_page_but_search(site):
+    generator = loaded_generator()
+    generator.load_manifest()
+    pages = {out for out in generator.manifest['outputs'] if '/search/' not in f'/{out}'}
+
+    assert build(optimize=True) == pages
+
+
+def test_removed_project_drops_its_pages(site):
+    slug = loaded_generator().projects[-1].slug
+    shutil.rmtree(site / "content" / "project" / slug)
+
+    assert build() == per_lang('projects.html', 'projects.json', *SEARCH_FILES)
+    for prefix in LANG_PREFIXES:
+        assert not (site / "dist" / f"{prefix}projects/{slug}.html").exists()
+
+
+def test_partial_build_leaves_manifest_for_next_full_build(site):
+    slug = loaded_generator().publications[0].slug
+    with open(site / "content" / "publication" / slug / "index.md", 'a', encoding='utf-8') as f:
+        f.write("\nOne more paragraph.\n")
+    manifest = (site / "dist" / MANIFEST_NAME).read_bytes()
+
+    assert build(only=['publications'], langs=['en']) == {'publications.html', 'publications.json'}
+    assert (site / "dist" / MANIFEST_NAME).read_bytes() == manifest
+    # The full build still sees the edit, and re-renders the selected pages too
+    assert build() == per_lang('index.html', 'publications.html', 'publications.json', *SEARCH_FILES)
@@ -0,0 +1,92 @@
+"""publish.py: the committed tree must be exactly the build output"""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from generator import MANIFEST_NAME
+from publish import publish
+
+FILES = {
+    'index.html': b'<!DOCTYPE html><title>Home</title>\n',
+    'zh/index.html': '<title>主页</title>\n'.encode('utf-8'),
+    'style.css': b'body{margin:0}',
+    'style.3f2a9c1e.css': b'body{margin:0}',
+    'search/0.json': b'{}',
+    'project/a b/featured image.png': bytes(range(256)) * 4,
+    'project/a b/notes.txt': b'crlf\r\nline endings\r\n',
+    'uploads/résumé.pdf': b'%PDF-1.4\n\x00\xff binary\n',
+    'empty.txt': b'',
+}
+
+
+def git(*args: str) -> bytes:
+    return subprocess.run(['git', *args], check=True, capture_output=True).stdout
+
+
+def write_files(root: Path, files: dict):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def committed_files(ref: str) -> dict:
+    """{path: content} of every file in a commit's tree"""
+    names = git('ls-tree', '-r', '-z', '--name-only', ref).decode('utf-8').split('\0')
+    return {name: git('cat-file', 'blob', f'{ref}:{name}') for name in names if name}
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch, git_env):
+    """An empty git repository (the working directory) with a build in dist/"""
+    monkeypatch.chdir(tmp_path)
+    git('init', '--quiet')
+    write_files(tmp_path / "dist", FILES)
+    (tmp_path / "dist" / MANIFEST_NAME).write_text('{}', encoding='utf-8')
+    return tmp_path
+
+
+def test_publish_commits_build_output(repo):
+    commit = publish(Path("dist"), message="Deploy")
+
+    assert git('rev-parse', 'refs/heads/gh-pages').decode().strip() == commit
+    assert committed_files(commit) == FILES
+    assert git('log', '--format=%s', commit).decode().strip() == "Deploy"
+    # A checkout of the branch reproduces the tree
+    git('worktree', 'add', '--quiet', 'checkout', 'gh-pages')
+    for rel, data in FILES.items():
+        assert (repo / "checkout" / rel).read_bytes() == data
+
+
+def test_unchanged_build_is_not_committed(repo):
+    commit = publish(Path("dist"))
+
+    assert publish(Path("dist")) is None
+    assert git('rev-parse', 'gh-pages').decode().strip() == commit
+
+
+def test_changes_are_committed_on_top(repo):
+    first = publish(Path("dist"))
+    changed = {**FILES, 'index.html': b'<title>New</title>\n', 'project/c/new.txt': b'new'}
+    del changed['style.3f2a9c1e.css']
+    (repo / "dist" / "style.3f2a9c1e.css").unlink()
+    write_files(repo / "dist", changed)
+
+    second = publish(Path("dist"))
+
+    assert committed_files(second) == changed
+    assert git('rev-parse', f'{second}^').decode().strip() == first
+    diff = git('diff', '--name-only', '-z', first, second).decode('utf-8').split('\0')
+    assert sorted(filter(None, diff)) == ['index.html', 'project/c/new.txt', 'style.3f2a9c1e.css']
+
+
+def test_pushes_to_remote(repo, tmp_path_factory):
+    remote = tmp_path_factory.mktemp('remote')
+    git('init', '--quiet', '--bare', str(remote))
+    git('remote', 'add', 'origin', str(remote))
+
+    commit = publish(Path("dist"), remote='origin')
+
+    assert git('--git-dir', str(remote), 'rev-parse', 'gh-pages').decode().strip() == commit
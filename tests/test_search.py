@@ -0,0 +1,60 @@
+"""Search terms: the index (search_tokens) and script.js must agree"""
+
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import REPO
+from generator import search_shard, search_tokens, SEARCH_SHARDS
+
+TEXTS = [
+    "Serverless LLM inference",
+    "GPU-accelerated   key/value stores, v2.0 (2024)",
+    "snake_case and CamelCase words",
+    "Café, naïve, façade, Ångström",
+    "Café with a combining accent",
+    "ﬁnely ﬂattened ligatures",
+    "ＦＵＬＬＷＩＤＴＨ ｌｅｔｔｅｒｓ ａｎｄ １２３",
+    "深度学习系统",
+    "大规模模型推理 with vLLM",
+    "字",
+    "混合mixed文本text",
+    "カタカナとひらがな",
+    "한국어 텍스트",
+    "Ελληνικά και русский",
+    "𝐁𝐨𝐥𝐝 math letters",
+    "\U00020000\U00020001 outside the CJK runs",
+    "emoji 🚀 and symbols © ™ ½",
+    "",
+]
+
+
+def js_tokens(texts: list) -> list:
+    """[searchTokens(text), searchShard(term) for each term] from script.js"""
+    script = (REPO / "templates" / "script.js").read_text(encoding='utf-8')
+    code = re.search(r'^const SEARCH_WORD.*?^function searchShard\(.*?^}$', script, re.M | re.S).group()
+    program = code + f'''
+const texts = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(texts.map(text => {{
+    const tokens = searchTokens(text);
+    return [tokens, tokens.map(term => searchShard(term, {SEARCH_SHARDS}))];
+}})));
+'''
+    result = subprocess.run(['node', '-e', program], input=json.dumps(texts), capture_output=True,
+                            text=True, encoding='utf-8', check=True)
+    return json.loads(result.stdout)
+
+
+def test_cjk_runs_become_bigrams():
+    assert search_tokens("深度学习 Systems") == ["深度", "度学", "学习", "systems"]
+    assert search_tokens("混合mixed字") == ["混合", "mixed", "字"]
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_tokens_match_script_js():
+    for text, (tokens, shards) in zip(TEXTS, js_tokens(TEXTS)):
+        assert search_tokens(text) == tokens, text
+        assert [search_shard(term) for term in tokens] == shards, text